@@ -8,6 +8,7 @@ from aiogram.fsm.storage.memory import MemoryStorage
 from sqlalchemy.orm import sessionmaker
 
 from config.settings import Settings
+from db.optimization.connection_pool import pool_capacity
 from bot.middlewares.db_session import DBSessionMiddleware
 from bot.middlewares.i18n import I18nMiddleware, get_i18n_instance, JsonI18n
 from bot.middlewares.ban_check_middleware import BanCheckMiddleware
@@ -28,7 +29,10 @@ def build_dispatcher(settings: Settings, async_session_factory: sessionmaker) ->
     dp["i18n_instance"] = i18n_instance
     dp["async_session_factory"] = async_session_factory
 
-    dp.update.outer_middleware(DBSessionMiddleware(async_session_factory))
+    # Одновременных сессий не больше, чем соединений в пуле
+    engine = async_session_factory.kw.get("bind")
+    session_limit = pool_capacity(engine) if engine is not None else None
+    dp.update.outer_middleware(DBSessionMiddleware(async_session_factory, session_limit))
     dp.update.outer_middleware(I18nMiddleware(i18n=i18n_instance, settings=settings))
     dp.update.outer_middleware(ProfileSyncMiddleware())
     dp.update.outer_middleware(BanCheckMiddleware(settings=settings, i18n_instance=i18n_instance))
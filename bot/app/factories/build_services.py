@@ -87,15 +87,20 @@ def build_core_services(
     }
 
 
-def create_balance_service(session) -> BalanceService:
+def create_balance_service(session, autocommit: bool = True) -> BalanceService:
     """
     Создать экземпляр BalanceService.
     
+    Операции записи сервиса фиксируют транзакцию сами; внутри
+    DBSessionMiddleware или собственной транзакции передайте
+    autocommit=False.
+    
     Args:
         session: Асинхронная сессия БД
+        autocommit: Выполнять commit после каждой операции записи
         
     Returns:
         Экземпляр BalanceService
     """
-    return BalanceService(session)
+    return BalanceService(session, autocommit=autocommit)
 
@@ -3,18 +3,22 @@
 """
 import logging
 from aiogram import Router, F
-from aiogram.types import CallbackQuery, Message
+from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup
 from aiogram.filters import Command
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from bot.services.balance_service import BalanceService
-from db.dal import subscription_dal, user_dal
+from bot.services import balance_service
+from db.dal import user_dal
 from bot.keyboards.inline.profile_keyboards import (
     get_profile_keyboard,
     get_balance_details_keyboard,
     get_transaction_history_keyboard,
-    get_add_balance_keyboard
+    get_add_balance_keyboard,
+    HistoryCB,
+    HISTORY_NEWER
 )
 from bot.utils.formatters import (
     format_balance,
@@ -28,15 +32,49 @@ from config.settings import Settings
 router = Router(name="user_profile_router")
 
 
+async def _edit_profile_message(
+    message: Message,
+    text: str,
+    keyboard: InlineKeyboardMarkup,
+    state: Optional[FSMContext],
+    log_label: str
+) -> None:
+    """
+    Отредактировать сообщение профиля, пропуская запрос к Telegram,
+    если текст и клавиатура не изменились с прошлого показа.
+    """
+    render_key = (message.message_id, hash((text, keyboard.model_dump_json())))
+    if state is not None:
+        data = await state.get_data()
+        if data.get("profile_render") == render_key:
+            return
+    
+    try:
+        await message.edit_text(text, reply_markup=keyboard)
+    except TelegramBadRequest as e:
+        if "message is not modified" not in str(e):
+            logging.warning(f"Failed to edit {log_label}: {e}")
+            await message.answer(text, reply_markup=keyboard)
+            return
+    except Exception as e:
+        logging.warning(f"Failed to edit {log_label}: {e}")
+        await message.answer(text, reply_markup=keyboard)
+        return
+    
+    if state is not None:
+        await state.update_data(profile_render=render_key)
+
+
 @router.message(Command("profile"))
 async def show_profile_command(
     message: Message,
     session: AsyncSession,
     settings: Settings,
-    i18n_data: dict
+    i18n_data: dict,
+    state: FSMContext
 ):
     """Показать профиль пользователя по команде /profile"""
-    await show_profile(message, session, settings, i18n_data, is_callback=False)
+    await show_profile(message, session, settings, i18n_data, is_callback=False, state=state)
 
 
 @router.callback_query(F.data == "profile:show")
@@ -44,11 +82,12 @@ async def show_profile_callback(
     callback: CallbackQuery,
     session: AsyncSession,
     settings: Settings,
-    i18n_data: dict
+    i18n_data: dict,
+    state: FSMContext
 ):
     """Показать профиль пользователя по callback"""
     await callback.answer()
-    await show_profile(callback, session, settings, i18n_data, is_callback=True)
+    await show_profile(callback, session, settings, i18n_data, is_callback=True, state=state)
 
 
 async def show_profile(
@@ -56,7 +95,8 @@ async def show_profile(
     session: AsyncSession,
     settings: Settings,
     i18n_data: dict,
-    is_callback: bool = False
+    is_callback: bool = False,
+    state: Optional[FSMContext] = None
 ):
     """
     Показать профиль пользователя.
@@ -67,6 +107,7 @@ async def show_profile(
         settings: Настройки бота
         i18n_data: Данные локализации
         is_callback: Является ли событие callback
+        state: FSM-контекст для пропуска неизмененных правок
     """
     user_id = event.from_user.id
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
@@ -78,43 +119,30 @@ async def show_profile(
     
     _ = lambda key, **kwargs: i18n.gettext(current_lang, key, **kwargs)
     
-    # Получить данные пользователя
-    balance_service = BalanceService(session)
-    
-    try:
-        balance = await balance_service.get_balance(user_id)
-    except ValueError:
-        balance = 0
-    
-    # Получить количество активных подписок
-    user = await user_dal.get_user_by_id(session, user_id)
-    subscriptions_count = 0
-    
-    if user and user.panel_user_uuid:
-        active_sub = await subscription_dal.get_active_subscription_by_user_id(
-            session, user_id, user.panel_user_uuid
-        )
-        if active_sub and active_sub.is_active:
-            subscriptions_count = 1
+    # Баланс и наличие активной подписки одним скалярным запросом
+    summary = await user_dal.get_profile_summary(session, user_id)
+    balance, has_active_subscription = summary or (0, False)
+    subscriptions_count = 1 if has_active_subscription else 0
     
     # Форматировать сообщение
-    text = f"👤 <b>{_('profile_title')}</b>\n\n"
-    text += f"💰 {_('profile_balance_label')}: <b>{format_balance(balance)}</b>\n"
-    text += f"📊 {_('profile_subscriptions_label')}: <b>{subscriptions_count}</b>\n\n"
+    parts = [
+        f"👤 <b>{_('profile_title')}</b>\n\n",
+        f"💰 {_('profile_balance_label')}: <b>{format_balance(balance)}</b>\n",
+        f"📊 {_('profile_subscriptions_label')}: <b>{subscriptions_count}</b>\n\n",
+    ]
     
     if subscriptions_count > 0:
-        text += f"<i>{_('profile_has_active_subscriptions')}</i>"
+        parts.append(f"<i>{_('profile_has_active_subscriptions')}</i>")
     else:
-        text += f"<i>{_('profile_no_active_subscriptions')}</i>"
+        parts.append(f"<i>{_('profile_no_active_subscriptions')}</i>")
+    text = "".join(parts)
     
     keyboard = get_profile_keyboard(balance, subscriptions_count, current_lang, i18n)
     
     if is_callback and isinstance(event, CallbackQuery) and event.message:
-        try:
-            await event.message.edit_text(text, reply_markup=keyboard)
-        except Exception as e:
-            logging.warning(f"Failed to edit profile message: {e}")
-            await event.message.answer(text, reply_markup=keyboard)
+        await _edit_profile_message(
+            event.message, text, keyboard, state, "profile message"
+        )
     else:
         await event.answer(text, reply_markup=keyboard)
 
@@ -124,7 +152,8 @@ async def show_balance_details(
     callback: CallbackQuery,
     session: AsyncSession,
     settings: Settings,
-    i18n_data: dict
+    i18n_data: dict,
+    state: FSMContext
 ):
     """Показать детали баланса"""
     await callback.answer()
@@ -139,46 +168,51 @@ async def show_balance_details(
     
     _ = lambda key, **kwargs: i18n.gettext(current_lang, key, **kwargs)
     
-    balance_service = BalanceService(session)
-    
     try:
-        balance = await balance_service.get_balance(user_id)
-        transactions = await balance_service.get_transaction_history(user_id, limit=5)
+        balance = await balance_service.get_balance(session, user_id)
+        transactions = await balance_service.get_transaction_history(
+            session, user_id, limit=5
+        )
     except ValueError as e:
         logging.error(f"Error getting balance for user {user_id}: {e}")
         await callback.answer(_("error_occurred_try_again"), show_alert=True)
         return
     
-    text = f"💰 <b>{_('balance_details_title')}</b>\n\n"
-    text += f"{_('current_balance_label')}: <b>{format_balance(balance)}</b>\n\n"
+    parts = [
+        f"💰 <b>{_('balance_details_title')}</b>\n\n",
+        f"{_('current_balance_label')}: <b>{format_balance(balance)}</b>\n\n",
+    ]
     
     if transactions:
-        text += f"<b>{_('recent_transactions_label')}:</b>\n"
+        parts.append(f"<b>{_('recent_transactions_label')}:</b>\n")
         for trans in transactions:
             amount_str = format_amount_with_sign(trans.amount_kopeks)
-            trans_type = format_transaction_type(trans.transaction_type)
-            text += f"\n{amount_str} - {trans_type}\n"
-            text += f"<i>{format_date(trans.created_at)}</i>\n"
+            trans_type = format_transaction_type(trans.transaction_type, _)
+            parts.append(
+                f"\n{amount_str} - {trans_type}\n"
+                f"<i>{format_date(trans.created_at)}</i>\n"
+            )
     else:
-        text += f"<i>{_('no_transactions_yet')}</i>"
+        parts.append(f"<i>{_('no_transactions_yet')}</i>")
+    text = "".join(parts)
     
     keyboard = get_balance_details_keyboard(current_lang, i18n)
     
     if callback.message:
-        try:
-            await callback.message.edit_text(text, reply_markup=keyboard)
-        except Exception as e:
-            logging.warning(f"Failed to edit balance details: {e}")
-            await callback.message.answer(text, reply_markup=keyboard)
+        await _edit_profile_message(
+            callback.message, text, keyboard, state, "balance details"
+        )
 
 
 @router.callback_query(F.data == "profile:transaction_history")
-@router.callback_query(F.data.startswith("profile:history:"))
+@router.callback_query(HistoryCB.filter())
 async def show_transaction_history(
     callback: CallbackQuery,
     session: AsyncSession,
     settings: Settings,
-    i18n_data: dict
+    i18n_data: dict,
+    state: FSMContext,
+    callback_data: Optional[HistoryCB] = None
 ):
     """Показать историю транзакций"""
     await callback.answer()
@@ -193,60 +227,77 @@ async def show_transaction_history(
     
     _ = lambda key, **kwargs: i18n.gettext(current_lang, key, **kwargs)
     
-    # Определить страницу
+    # Определить страницу и курсор (разобраны фильтром HistoryCB)
     page = 0
-    if callback.data.startswith("profile:history:"):
-        try:
-            page = int(callback.data.split(":")[-1])
-        except (ValueError, IndexError):
-            page = 0
+    direction = None
+    cursor = None
+    if callback_data is not None:
+        page = callback_data.page
+        direction = callback_data.direction
+        cursor = callback_data.cursor
     
-    balance_service = BalanceService(session)
     per_page = 10
+    newer = direction == HISTORY_NEWER
     
     try:
         transactions = await balance_service.get_transaction_history(
+            session,
             user_id,
-            limit=per_page + 1,  # +1 чтобы проверить есть ли еще
-            offset=page * per_page
+            limit=per_page if newer else per_page + 1,  # +1 чтобы проверить есть ли еще
+            before=None if newer else cursor,
+            after=cursor if newer else None
         )
     except Exception as e:
         logging.error(f"Error getting transaction history for user {user_id}: {e}")
         await callback.answer(_("error_occurred_try_again"), show_alert=True)
         return
     
-    has_more = len(transactions) > per_page
+    # Переход на более новую страницу означает, что более старые записи есть
+    has_more = newer or len(transactions) > per_page
     transactions = transactions[:per_page]
     
-    text = f"📜 <b>{_('transaction_history_title')}</b>\n"
-    text += f"<i>{_('page_label')}: {page + 1}</i>\n\n"
+    parts = [
+        f"📜 <b>{_('transaction_history_title')}</b>\n",
+        f"<i>{_('page_label')}: {page + 1}</i>\n\n",
+    ]
     
     if transactions:
         for trans in transactions:
             amount_str = format_amount_with_sign(trans.amount_kopeks)
-            trans_type = format_transaction_type(trans.transaction_type)
-            text += f"{amount_str} - {trans_type}\n"
-            if trans.description:
-                text += f"<i>{trans.description}</i>\n"
-            text += f"{format_date(trans.created_at)}\n\n"
+            trans_type = format_transaction_type(trans.transaction_type, _)
+            description = f"<i>{trans.description}</i>\n" if trans.description else ""
+            parts.append(
+                f"{amount_str} - {trans_type}\n"
+                f"{description}"
+                f"{format_date(trans.created_at)}\n\n"
+            )
     else:
-        text += f"<i>{_('no_transactions_on_page')}</i>"
-    
-    keyboard = get_transaction_history_keyboard(current_lang, i18n, page, has_more)
+        parts.append(f"<i>{_('no_transactions_on_page')}</i>")
+    text = "".join(parts)
+    
+    newer_cursor = (
+        (transactions[0].created_at, transactions[0].id) if transactions else None
+    )
+    older_cursor = (
+        (transactions[-1].created_at, transactions[-1].id)
+        if transactions and has_more else None
+    )
+    keyboard = get_transaction_history_keyboard(
+        current_lang, i18n, page, newer_cursor, older_cursor
+    )
     
     if callback.message:
-        try:
-            await callback.message.edit_text(text, reply_markup=keyboard)
-        except Exception as e:
-            logging.warning(f"Failed to edit transaction history: {e}")
-            await callback.message.answer(text, reply_markup=keyboard)
+        await _edit_profile_message(
+            callback.message, text, keyboard, state, "transaction history"
+        )
 
 
 @router.callback_query(F.data == "profile:add_balance")
 async def show_add_balance_options(
     callback: CallbackQuery,
     settings: Settings,
-    i18n_data: dict
+    i18n_data: dict,
+    state: FSMContext
 ):
     """Показать опции пополнения баланса"""
     await callback.answer()
@@ -267,8 +318,6 @@ async def show_add_balance_options(
     keyboard = get_add_balance_keyboard(current_lang, i18n)
     
     if callback.message:
-        try:
-            await callback.message.edit_text(text, reply_markup=keyboard)
-        except Exception as e:
-            logging.warning(f"Failed to edit add balance message: {e}")
-            await callback.message.answer(text, reply_markup=keyboard)
\ No newline at end of file
+        await _edit_profile_message(
+            callback.message, text, keyboard, state, "add balance message"
+        )
\ No newline at end of file
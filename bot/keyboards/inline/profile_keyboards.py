@@ -1,9 +1,57 @@
 """
 Клавиатуры для профиля пользователя.
+
+Разметка зависит только от языка и нескольких флагов, поэтому готовые
+InlineKeyboardMarkup кэшируются и переиспользуются между вызовами.
+Возвращаемые объекты нельзя изменять.
 """
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+from aiogram.filters.callback_data import CallbackData
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from typing import Optional
+from typing import Optional, Tuple
+
+HISTORY_OLDER = "b"
+HISTORY_NEWER = "a"
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class HistoryCB(CallbackData, prefix="profile_history"):
+    """
+    Callback страницы истории транзакций.
+    
+    Курсор — граничная транзакция (created_at, id); время хранится в
+    микросекундах от эпохи, чтобы уложиться в 64 байта callback_data.
+    """
+    page: int
+    direction: str
+    created_us: int
+    tx_id: int
+    
+    @classmethod
+    def from_cursor(
+        cls,
+        page: int,
+        direction: str,
+        cursor: Tuple[datetime, int]
+    ) -> "HistoryCB":
+        created_at, tx_id = cursor
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        return cls(
+            page=page,
+            direction=direction,
+            created_us=(created_at - _EPOCH) // _MICROSECOND,
+            tx_id=tx_id
+        )
+    
+    @property
+    def cursor(self) -> Tuple[datetime, int]:
+        return _EPOCH + timedelta(microseconds=self.created_us), self.tx_id
 
 
 def get_profile_keyboard(
@@ -20,10 +68,22 @@ def get_profile_keyboard(
         subscriptions_count: Количество активных подписок
         lang: Код языка
         i18n_instance: Экземпляр i18n для переводов
-        
+    
     Returns:
         Клавиатура профиля
     """
+    return _build_profile_keyboard(
+        lang, i18n_instance, _i18n_version(i18n_instance), subscriptions_count > 0
+    )
+
+
+@lru_cache(maxsize=256)
+def _build_profile_keyboard(
+    lang: str,
+    i18n_instance,
+    i18n_version: int,
+    has_subscriptions: bool
+) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     builder = InlineKeyboardBuilder()
     
@@ -48,7 +108,7 @@ def get_profile_keyboard(
     )
     
     # Кнопка управления подписками (если есть активные)
-    if subscriptions_count > 0:
+    if has_subscriptions:
         builder.row(
             InlineKeyboardButton(
                 text=_("profile_manage_subscriptions_button"),
@@ -77,10 +137,21 @@ def get_balance_details_keyboard(
     Args:
         lang: Код языка
         i18n_instance: Экземпляр i18n для переводов
-        
+    
     Returns:
         Клавиатура деталей баланса
     """
+    return _build_balance_details_keyboard(
+        lang, i18n_instance, _i18n_version(i18n_instance)
+    )
+
+
+@lru_cache(maxsize=256)
+def _build_balance_details_keyboard(
+    lang: str,
+    i18n_instance,
+    i18n_version: int
+) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     builder = InlineKeyboardBuilder()
     
@@ -112,7 +183,8 @@ def get_transaction_history_keyboard(
     lang: str,
     i18n_instance,
     page: int = 0,
-    has_more: bool = False
+    newer_cursor: Optional[Tuple[datetime, int]] = None,
+    older_cursor: Optional[Tuple[datetime, int]] = None
 ) -> InlineKeyboardMarkup:
     """
     Клавиатура для истории транзакций с пагинацией.
@@ -121,43 +193,62 @@ def get_transaction_history_keyboard(
         lang: Код языка
         i18n_instance: Экземпляр i18n для переводов
         page: Текущая страница
-        has_more: Есть ли еще транзакции
-        
+        newer_cursor: Первая транзакция страницы, если есть предыдущая страница
+        older_cursor: Последняя транзакция страницы, если есть еще транзакции
+    
     Returns:
         Клавиатура истории транзакций
     """
-    _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
-    builder = InlineKeyboardBuilder()
-    
     # Кнопки навигации
     nav_buttons = []
-    if page > 0:
+    if page > 0 and newer_cursor is not None:
         nav_buttons.append(
             InlineKeyboardButton(
                 text="⬅️",
-                callback_data=f"profile:history:{page-1}"
+                callback_data=HistoryCB.from_cursor(page - 1, HISTORY_NEWER, newer_cursor).pack()
             )
         )
-    if has_more:
+    if older_cursor is not None:
         nav_buttons.append(
             InlineKeyboardButton(
                 text="➡️",
-                callback_data=f"profile:history:{page+1}"
+                callback_data=HistoryCB.from_cursor(page + 1, HISTORY_OLDER, older_cursor).pack()
             )
         )
     
-    if nav_buttons:
-        builder.row(*nav_buttons)
-    
+    back_row = _build_history_back_row(lang, i18n_instance, _i18n_version(i18n_instance))
+    rows = [nav_buttons, back_row] if nav_buttons else [back_row]
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+@lru_cache(maxsize=256)
+def _build_history_back_row(
+    lang: str,
+    i18n_instance,
+    i18n_version: int
+) -> list:
     # Кнопка возврата
-    builder.row(
+    return [
         InlineKeyboardButton(
-            text=_("back_to_balance_button"),
+            text=i18n_instance.gettext(lang, "back_to_balance_button"),
             callback_data="profile:show_balance"
         )
+    ]
+
+
+# Предустановленные суммы для пополнения (в рублях), по две в ряд
+ADD_BALANCE_AMOUNTS = (100, 300, 500, 1000, 2000, 5000)
+
+_AMOUNT_ROWS = tuple(
+    tuple(
+        InlineKeyboardButton(
+            text=f"{amount} ₽",
+            callback_data=f"profile:add_balance:{amount * 100}"
+        )
+        for amount in ADD_BALANCE_AMOUNTS[i:i + 2]
     )
-    
-    return builder.as_markup()
+    for i in range(0, len(ADD_BALANCE_AMOUNTS), 2)
+)
 
 
 def get_add_balance_keyboard(
@@ -170,27 +261,26 @@ def get_add_balance_keyboard(
     Args:
         lang: Код языка
         i18n_instance: Экземпляр i18n для переводов
-        
+    
     Returns:
         Клавиатура пополнения баланса
     """
+    return _build_add_balance_keyboard(
+        lang, i18n_instance, _i18n_version(i18n_instance)
+    )
+
+
+@lru_cache(maxsize=256)
+def _build_add_balance_keyboard(
+    lang: str,
+    i18n_instance,
+    i18n_version: int
+) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     builder = InlineKeyboardBuilder()
     
-    # Предустановленные суммы для пополнения
-    amounts = [100, 300, 500, 1000, 2000, 5000]
-    
-    for i in range(0, len(amounts), 2):
-        row_buttons = []
-        for j in range(2):
-            if i + j < len(amounts):
-                amount = amounts[i + j]
-                row_buttons.append(
-                    InlineKeyboardButton(
-                        text=f"{amount} ₽",
-                        callback_data=f"profile:add_balance:{amount * 100}"
-                    )
-                )
+    # Кнопки сумм не зависят от языка и создаются один раз
+    for row_buttons in _AMOUNT_ROWS:
         builder.row(*row_buttons)
     
     # Кнопка для ввода произвольной суммы
@@ -209,4 +299,4 @@ def get_add_balance_keyboard(
         )
     )
     
-    return builder.as_markup()
\ No newline at end of file
+    return builder.as_markup()
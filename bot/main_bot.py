@@ -15,6 +15,7 @@ from sqlalchemy.orm import sessionmaker
 from config.settings import Settings
 
 from db.database_setup import init_db_connection
+from db.optimization.connection_pool import prewarm_tables, warm_up_connection_pool
 
 from bot.middlewares.i18n import I18nMiddleware, get_i18n_instance, JsonI18n
 from bot.middlewares.db_session import DBSessionMiddleware
@@ -56,6 +57,18 @@ async def on_startup_configured(dispatcher: Dispatcher):
 
     logging.info("STARTUP: on_startup_configured executing...")
 
+    from db.database_setup import async_engine as global_async_engine
+
+    if global_async_engine:
+        try:
+            await warm_up_connection_pool(
+                global_async_engine, global_async_engine.pool.size()
+            )
+            await prewarm_tables(
+                global_async_engine, ("users", "subscriptions", "transactions")
+            )
+        except Exception as e:
+            logging.warning(f"STARTUP: Failed to warm up DB connection pool: {e}")
 
     telegram_webhook_url_to_set = settings.WEBHOOK_BASE_URL
     if telegram_webhook_url_to_set:
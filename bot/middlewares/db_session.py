@@ -1,5 +1,7 @@
+import asyncio
+import contextlib
 import logging
-from typing import Callable, Dict, Any, Awaitable
+from typing import Callable, Dict, Any, Awaitable, Optional
 
 from aiogram import BaseMiddleware
 from aiogram.types import Update
@@ -8,9 +10,19 @@ from sqlalchemy.orm import sessionmaker
 
 class DBSessionMiddleware(BaseMiddleware):
 
-    def __init__(self, async_session_factory: sessionmaker):
+    def __init__(
+        self,
+        async_session_factory: sessionmaker,
+        max_concurrent_sessions: Optional[int] = None,
+    ):
         super().__init__()
         self.async_session_factory = async_session_factory
+        # Обновления сверх емкости пула ждут своей очереди на семафоре
+        # (FIFO), а не на внутренней блокировке пула с pool_timeout
+        self._session_limit = (
+            asyncio.Semaphore(max_concurrent_sessions)
+            if max_concurrent_sessions else None
+        )
 
     async def __call__(
         self,
@@ -24,17 +36,18 @@ class DBSessionMiddleware(BaseMiddleware):
                 "async_session_factory not provided to DBSessionMiddleware"
             )
 
-        async with self.async_session_factory() as session:
-            data["session"] = session
-            try:
-                result = await handler(event, data)
-
-                await session.commit()
-                return result
-            except Exception:
-                await session.rollback()
-                logging.error(
-                    "DBSessionMiddleware: Exception caused rollback.", exc_info=True
-                )
-                raise
+        async with self._session_limit or contextlib.nullcontext():
+            async with self.async_session_factory() as session:
+                data["session"] = session
+                try:
+                    result = await handler(event, data)
+
+                    await session.commit()
+                    return result
+                except Exception:
+                    await session.rollback()
+                    logging.error(
+                        "DBSessionMiddleware: Exception caused rollback.", exc_info=True
+                    )
+                    raise
 
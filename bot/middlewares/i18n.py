@@ -1,3 +1,4 @@
+import functools
 import logging
 import json
 import os
@@ -18,12 +19,16 @@ class JsonI18n:
         self.path = path
         self.default_lang = default
         self.locales_data: Dict[str, Dict[str, str]] = {}
+        # Bumped on every (re)load so cached lookups never outlive the data
+        self._version = 0
+        self._cached_lookup = functools.lru_cache(maxsize=4096)(self._lookup)
         self._load_locales()
         logging.info(
             f"JsonI18n initialized. Loaded languages: {list(self.locales_data.keys())}. Default: {self.default_lang}"
         )
 
     def _load_locales(self):
+        self._version += 1
         if not os.path.isdir(self.path):
             logging.error(
                 f"Locales path not found or not a directory: {self.path}")
@@ -44,7 +49,32 @@ class JsonI18n:
                         f"Error loading locale {lang_code} from {file_path}: {e_load}",
                         exc_info=True)
 
+    @property
+    def version(self) -> int:
+        """Monotonic counter of locale (re)loads, usable as a cache key."""
+        return self._version
+
+    def reload(self) -> None:
+        """Re-read locale files and drop all cached translations."""
+        self.locales_data = {}
+        self._load_locales()
+        self._cached_lookup.cache_clear()
+
     def gettext(self, lang_code: Optional[str], key: str, **kwargs) -> str:
+        kwargs_items = tuple(sorted(kwargs.items())) if kwargs else ()
+        try:
+            hash(kwargs_items)
+        except TypeError:
+            # Unhashable format arguments can't be memoized
+            return self._translate(lang_code, key, kwargs)
+        return self._cached_lookup(self._version, lang_code, key, kwargs_items)
+
+    def _lookup(self, version: int, lang_code: Optional[str], key: str,
+                kwargs_items: tuple) -> str:
+        return self._translate(lang_code, key, dict(kwargs_items))
+
+    def _translate(self, lang_code: Optional[str], key: str,
+                   kwargs: Dict[str, Any]) -> str:
         # Determine effective language with robust fallback
         if lang_code and lang_code in self.locales_data:
             effective_lang_code = lang_code
@@ -1,26 +1,315 @@
 """
 Сервис для управления балансом пользователей.
+
+Функции модуля не фиксируют транзакцию сами: commit/rollback выполняет
+вызывающий код (в обработчиках — DBSessionMiddleware один раз на
+обновление), поэтому несколько операций в одном обработчике атомарны.
+BalanceService по умолчанию фиксирует каждую операцию записи.
 """
 import logging
-from typing import Optional, List
+from datetime import datetime
+from typing import Optional, List, Tuple
+from sqlalchemy import update
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.dal import user_dal
 from db.dal import transaction_dal
-from db.models import Transaction
+from db.models import Transaction, User
+
+logger = logging.getLogger(__name__)
+
+
+async def _change_balance(
+    session: AsyncSession,
+    user_id: int,
+    delta_kopeks: int
+) -> Optional[int]:
+    """
+    Атомарно изменить баланс пользователя одним UPDATE ... RETURNING.
+    
+    При списании (delta_kopeks < 0) строка обновляется только если
+    средств достаточно, поэтому проверка и запись не разделены гонкой.
+    
+    Args:
+        session: Асинхронная сессия БД
+        user_id: ID пользователя
+        delta_kopeks: Изменение баланса в копейках
+        
+    Returns:
+        Новый баланс или None, если строка не обновлена
+    """
+    stmt = (
+        update(User)
+        .where(User.user_id == user_id)
+        .values(balance_kopeks=User.balance_kopeks + delta_kopeks)
+        .returning(User.balance_kopeks)
+    )
+    if delta_kopeks < 0:
+        stmt = stmt.where(User.balance_kopeks >= -delta_kopeks)
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def _raise_deduct_failure(
+    session: AsyncSession,
+    user_id: int,
+    amount_kopeks: int,
+    message: str
+) -> None:
+    """Выяснить причину несработавшего списания и поднять ValueError."""
+    user = await user_dal.get_user_by_id(session, user_id)
+    if not user:
+        raise ValueError(f"User {user_id} not found")
+    raise ValueError(
+        f"{message}: has {user.balance_kopeks}, needs {amount_kopeks}"
+    )
+
+
+async def add_balance(
+    session: AsyncSession,
+    user_id: int,
+    amount_kopeks: int,
+    description: Optional[str] = None
+) -> Transaction:
+    """
+    Пополнить баланс пользователя.
+    
+    Args:
+        session: Асинхронная сессия БД
+        user_id: ID пользователя
+        amount_kopeks: Сумма пополнения в копейках
+        description: Описание операции
+        
+    Returns:
+        Созданная транзакция
+        
+    Raises:
+        ValueError: Если сумма <= 0 или пользователь не найден
+    """
+    if amount_kopeks <= 0:
+        raise ValueError("Amount must be positive")
+    
+    # Обновить баланс
+    new_balance = await _change_balance(session, user_id, amount_kopeks)
+    if new_balance is None:
+        raise ValueError(f"User {user_id} not found")
+    
+    # Создать транзакцию
+    transaction = await transaction_dal.create_transaction(
+        session=session,
+        user_id=user_id,
+        amount_kopeks=amount_kopeks,
+        transaction_type="balance_add",
+        description=description or "Пополнение баланса"
+    )
+    
+    logger.info(
+        "Balance added for user %s: +%s kopeks. New balance: %s",
+        user_id, amount_kopeks, new_balance
+    )
+    
+    return transaction
+
+
+async def deduct_balance(
+    session: AsyncSession,
+    user_id: int,
+    amount_kopeks: int,
+    description: Optional[str] = None
+) -> Transaction:
+    """
+    Списать средства с баланса пользователя.
+    
+    Args:
+        session: Асинхронная сессия БД
+        user_id: ID пользователя
+        amount_kopeks: Сумма списания в копейках
+        description: Описание операции
+        
+    Returns:
+        Созданная транзакция
+        
+    Raises:
+        ValueError: Если сумма <= 0, недостаточно средств или пользователь не найден
+    """
+    if amount_kopeks <= 0:
+        raise ValueError("Amount must be positive")
+    
+    # Списать с баланса
+    new_balance = await _change_balance(session, user_id, -amount_kopeks)
+    if new_balance is None:
+        await _raise_deduct_failure(
+            session, user_id, amount_kopeks, "Insufficient balance"
+        )
+    
+    # Создать транзакцию (с отрицательной суммой)
+    transaction = await transaction_dal.create_transaction(
+        session=session,
+        user_id=user_id,
+        amount_kopeks=-amount_kopeks,
+        transaction_type="balance_deduct",
+        description=description or "Списание с баланса"
+    )
+    
+    logger.info(
+        "Balance deducted for user %s: -%s kopeks. New balance: %s",
+        user_id, amount_kopeks, new_balance
+    )
+    
+    return transaction
+
+
+async def get_balance(session: AsyncSession, user_id: int) -> int:
+    """
+    Получить текущий баланс пользователя.
+    
+    Args:
+        session: Асинхронная сессия БД
+        user_id: ID пользователя
+        
+    Returns:
+        Баланс в копейках
+        
+    Raises:
+        ValueError: Если пользователь не найден
+    """
+    user = await user_dal.get_user_by_id(session, user_id)
+    if not user:
+        raise ValueError(f"User {user_id} not found")
+    return user.balance_kopeks
+
+
+async def can_afford(session: AsyncSession, user_id: int, amount_kopeks: int) -> bool:
+    """
+    Проверить, достаточно ли средств на балансе.
+    
+    Args:
+        session: Асинхронная сессия БД
+        user_id: ID пользователя
+        amount_kopeks: Требуемая сумма в копейках
+        
+    Returns:
+        True если средств достаточно, иначе False
+    """
+    try:
+        balance = await get_balance(session, user_id)
+        return balance >= amount_kopeks
+    except ValueError:
+        return False
+
+
+async def get_transaction_history(
+    session: AsyncSession,
+    user_id: int,
+    limit: int = 10,
+    before: Optional[Tuple[datetime, int]] = None,
+    after: Optional[Tuple[datetime, int]] = None
+) -> List[Row]:
+    """
+    Получить историю транзакций пользователя.
+    
+    Args:
+        session: Асинхронная сессия БД
+        user_id: ID пользователя
+        limit: Максимальное количество записей
+        before: Курсор (created_at, id) — вернуть более старые записи
+        after: Курсор (created_at, id) — вернуть более новые записи
+        
+    Returns:
+        Строки транзакций (id, amount_kopeks, transaction_type,
+        description, created_at)
+    """
+    return await transaction_dal.get_user_transactions(
+        session=session,
+        user_id=user_id,
+        limit=limit,
+        before=before,
+        after=after
+    )
+
+
+async def process_subscription_purchase(
+    session: AsyncSession,
+    user_id: int,
+    amount_kopeks: int,
+    subscription_months: int,
+    description: Optional[str] = None
+) -> Transaction:
+    """
+    Обработать покупку подписки с баланса.
+    
+    Args:
+        session: Асинхронная сессия БД
+        user_id: ID пользователя
+        amount_kopeks: Стоимость подписки в копейках
+        subscription_months: Количество месяцев подписки
+        description: Описание операции
+        
+    Returns:
+        Созданная транзакция
+        
+    Raises:
+        ValueError: Если недостаточно средств или пользователь не найден
+    """
+    if amount_kopeks <= 0:
+        raise ValueError("Amount must be positive")
+    
+    # Списать с баланса
+    new_balance = await _change_balance(session, user_id, -amount_kopeks)
+    if new_balance is None:
+        await _raise_deduct_failure(
+            session,
+            user_id,
+            amount_kopeks,
+            "Insufficient balance for subscription purchase"
+        )
+    
+    # Создать транзакцию
+    transaction = await transaction_dal.create_transaction(
+        session=session,
+        user_id=user_id,
+        amount_kopeks=-amount_kopeks,
+        transaction_type="subscription_purchase",
+        description=description or f"Покупка подписки на {subscription_months} мес."
+    )
+    
+    logger.info(
+        "Subscription purchased from balance for user %s: "
+        "%s months, -%s kopeks. New balance: %s",
+        user_id, subscription_months, amount_kopeks, new_balance
+    )
+    
+    return transaction
 
 
 class BalanceService:
-    """Сервис для работы с балансом пользователей"""
+    """
+    Сервис для работы с балансом пользователей.
+    
+    Тонкая обертка над функциями модуля для кода, который хранит сессию
+    в объекте; обработчики вызывают функции модуля напрямую.
     
-    def __init__(self, session: AsyncSession):
+    В отличие от функций модуля, операции записи по умолчанию сами
+    фиксируют транзакцию: объектом пользуются вебхуки и воркеры, у которых
+    нет DBSessionMiddleware. Код, который сам управляет транзакцией,
+    передает autocommit=False.
+    """
+    
+    def __init__(self, session: AsyncSession, autocommit: bool = True):
         """
         Инициализация сервиса баланса.
         
         Args:
             session: Асинхронная сессия БД
+            autocommit: Выполнять commit после каждой операции записи
         """
         self.session = session
+        self.autocommit = autocommit
+    
+    async def _commit(self) -> None:
+        if self.autocommit:
+            await self.session.commit()
     
     async def add_balance(
         self,
@@ -28,46 +317,8 @@ class BalanceService:
         amount_kopeks: int,
         description: Optional[str] = None
     ) -> Transaction:
-        """
-        Пополнить баланс пользователя.
-        
-        Args:
-            user_id: ID пользователя
-            amount_kopeks: Сумма пополнения в копейках
-            description: Описание операции
-            
-        Returns:
-            Созданная транзакция
-            
-        Raises:
-            ValueError: Если сумма <= 0 или пользователь не найден
-        """
-        if amount_kopeks <= 0:
-            raise ValueError("Amount must be positive")
-        
-        user = await user_dal.get_user_by_id(self.session, user_id)
-        if not user:
-            raise ValueError(f"User {user_id} not found")
-        
-        # Обновить баланс
-        user.balance_kopeks += amount_kopeks
-        
-        # Создать транзакцию
-        transaction = await transaction_dal.create_transaction(
-            session=self.session,
-            user_id=user_id,
-            amount_kopeks=amount_kopeks,
-            transaction_type="balance_add",
-            description=description or "Пополнение баланса"
-        )
-        
-        await self.session.commit()
-        
-        logging.info(
-            f"Balance added for user {user_id}: +{amount_kopeks} kopeks. "
-            f"New balance: {user.balance_kopeks}"
-        )
-        
+        transaction = await add_balance(self.session, user_id, amount_kopeks, description)
+        await self._commit()
         return transaction
     
     async def deduct_balance(
@@ -76,111 +327,25 @@ class BalanceService:
         amount_kopeks: int,
         description: Optional[str] = None
     ) -> Transaction:
-        """
-        Списать средства с баланса пользователя.
-        
-        Args:
-            user_id: ID пользователя
-            amount_kopeks: Сумма списания в копейках
-            description: Описание операции
-            
-        Returns:
-            Созданная транзакция
-            
-        Raises:
-            ValueError: Если сумма <= 0, недостаточно средств или пользователь не найден
-        """
-        if amount_kopeks <= 0:
-            raise ValueError("Amount must be positive")
-        
-        user = await user_dal.get_user_by_id(self.session, user_id)
-        if not user:
-            raise ValueError(f"User {user_id} not found")
-        
-        if user.balance_kopeks < amount_kopeks:
-            raise ValueError(
-                f"Insufficient balance: has {user.balance_kopeks}, "
-                f"needs {amount_kopeks}"
-            )
-        
-        # Списать с баланса
-        user.balance_kopeks -= amount_kopeks
-        
-        # Создать транзакцию (с отрицательной суммой)
-        transaction = await transaction_dal.create_transaction(
-            session=self.session,
-            user_id=user_id,
-            amount_kopeks=-amount_kopeks,
-            transaction_type="balance_deduct",
-            description=description or "Списание с баланса"
-        )
-        
-        await self.session.commit()
-        
-        logging.info(
-            f"Balance deducted for user {user_id}: -{amount_kopeks} kopeks. "
-            f"New balance: {user.balance_kopeks}"
-        )
-        
+        transaction = await deduct_balance(self.session, user_id, amount_kopeks, description)
+        await self._commit()
         return transaction
     
     async def get_balance(self, user_id: int) -> int:
-        """
-        Получить текущий баланс пользователя.
-        
-        Args:
-            user_id: ID пользователя
-            
-        Returns:
-            Баланс в копейках
-            
-        Raises:
-            ValueError: Если пользователь не найден
-        """
-        user = await user_dal.get_user_by_id(self.session, user_id)
-        if not user:
-            raise ValueError(f"User {user_id} not found")
-        return user.balance_kopeks
+        return await get_balance(self.session, user_id)
     
     async def can_afford(self, user_id: int, amount_kopeks: int) -> bool:
-        """
-        Проверить, достаточно ли средств на балансе.
-        
-        Args:
-            user_id: ID пользователя
-            amount_kopeks: Требуемая сумма в копейках
-            
-        Returns:
-            True если средств достаточно, иначе False
-        """
-        try:
-            balance = await self.get_balance(user_id)
-            return balance >= amount_kopeks
-        except ValueError:
-            return False
+        return await can_afford(self.session, user_id, amount_kopeks)
     
     async def get_transaction_history(
         self,
         user_id: int,
         limit: int = 10,
-        offset: int = 0
-    ) -> List[Transaction]:
-        """
-        Получить историю транзакций пользователя.
-        
-        Args:
-            user_id: ID пользователя
-            limit: Максимальное количество записей
-            offset: Смещение для пагинации
-            
-        Returns:
-            Список транзакций
-        """
-        return await transaction_dal.get_user_transactions(
-            session=self.session,
-            user_id=user_id,
-            limit=limit,
-            offset=offset
+        before: Optional[Tuple[datetime, int]] = None,
+        after: Optional[Tuple[datetime, int]] = None
+    ) -> List[Row]:
+        return await get_transaction_history(
+            self.session, user_id, limit=limit, before=before, after=after
         )
     
     async def process_subscription_purchase(
@@ -190,52 +355,8 @@ class BalanceService:
         subscription_months: int,
         description: Optional[str] = None
     ) -> Transaction:
-        """
-        Обработать покупку подписки с баланса.
-        
-        Args:
-            user_id: ID пользователя
-            amount_kopeks: Стоимость подписки в копейках
-            subscription_months: Количество месяцев подписки
-            description: Описание операции
-            
-        Returns:
-            Созданная транзакция
-            
-        Raises:
-            ValueError: Если недостаточно средств или пользователь не найден
-        """
-        if amount_kopeks <= 0:
-            raise ValueError("Amount must be positive")
-        
-        user = await user_dal.get_user_by_id(self.session, user_id)
-        if not user:
-            raise ValueError(f"User {user_id} not found")
-        
-        if user.balance_kopeks < amount_kopeks:
-            raise ValueError(
-                f"Insufficient balance for subscription purchase: "
-                f"has {user.balance_kopeks}, needs {amount_kopeks}"
-            )
-        
-        # Списать с баланса
-        user.balance_kopeks -= amount_kopeks
-        
-        # Создать транзакцию
-        transaction = await transaction_dal.create_transaction(
-            session=self.session,
-            user_id=user_id,
-            amount_kopeks=-amount_kopeks,
-            transaction_type="subscription_purchase",
-            description=description or f"Покупка подписки на {subscription_months} мес."
-        )
-        
-        await self.session.commit()
-        
-        logging.info(
-            f"Subscription purchased from balance for user {user_id}: "
-            f"{subscription_months} months, -{amount_kopeks} kopeks. "
-            f"New balance: {user.balance_kopeks}"
+        transaction = await process_subscription_purchase(
+            self.session, user_id, amount_kopeks, subscription_months, description
         )
-        
+        await self._commit()
         return transaction
\ No newline at end of file
@@ -44,13 +44,11 @@ class SubscriptionService:
             user_record = await user_dal.get_user_by_id(session, user_id)
             if not user_record or not user_record.panel_user_uuid:
                 return False
-            active_sub = await subscription_dal.get_active_subscription_by_user_id(
+            # is_active / end_date are filtered in SQL; only the count comes back
+            active_count = await subscription_dal.count_active_subscriptions(
                 session, user_id, user_record.panel_user_uuid
             )
-            if not active_sub or not active_sub.end_date:
-                return False
-            from datetime import datetime, timezone
-            return active_sub.is_active and active_sub.end_date > datetime.now(timezone.utc)
+            return active_count > 0
         except Exception:
             return False
 
@@ -692,7 +690,7 @@ class SubscriptionService:
     async def get_active_subscription_details(
         self, session: AsyncSession, user_id: int
     ) -> Optional[Dict[str, Any]]:
-        db_user = await user_dal.get_user_by_id(session, user_id)
+        db_user = await user_dal.get_user_with_active_subscription(session, user_id)
         if not db_user or not db_user.panel_user_uuid:
             logging.info(
                 f"User {user_id} not found in DB or no panel_user_uuid for 'my_subscription'."
@@ -700,9 +698,7 @@ class SubscriptionService:
             return None
 
         panel_user_uuid = db_user.panel_user_uuid
-        local_active_sub = await subscription_dal.get_active_subscription_by_user_id(
-            session, user_id, panel_user_uuid
-        )
+        local_active_sub = db_user.active_subscription
         panel_user_data = await self.panel_service.get_user_by_uuid(panel_user_uuid)
 
         if not panel_user_data:
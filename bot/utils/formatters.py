@@ -2,7 +2,18 @@
 Утилиты для форматирования данных в читаемый вид.
 """
 from datetime import datetime
-from typing import Optional
+from types import MappingProxyType
+from typing import Callable, Optional
+
+# Ключи локализации для типов транзакций
+_TX_TYPE_KEYS = MappingProxyType({
+    "balance_add": "tx_type_balance_add",
+    "balance_deduct": "tx_type_balance_deduct",
+    "subscription_purchase": "tx_type_subscription_purchase",
+    "refund": "tx_type_refund",
+    "gift_sent": "tx_type_gift_sent",
+    "gift_received": "tx_type_gift_received",
+})
 
 
 def format_balance(kopeks: int) -> str:
@@ -23,8 +34,9 @@ def format_balance(kopeks: int) -> str:
         >>> format_balance(-5000)
         '-50.00 ₽'
     """
-    rubles = kopeks / 100
-    return f"{rubles:.2f} ₽"
+    sign = "-" if kopeks < 0 else ""
+    rubles, rest = divmod(abs(kopeks), 100)
+    return f"{sign}{rubles}.{rest:02d} ₽"
 
 
 def format_date(dt: Optional[datetime]) -> str:
@@ -49,25 +61,25 @@ def format_date(dt: Optional[datetime]) -> str:
     return dt.strftime("%d.%m.%Y %H:%M")
 
 
-def format_transaction_type(transaction_type: str) -> str:
+def format_transaction_type(
+    transaction_type: str,
+    _: Optional[Callable[[str], str]] = None
+) -> str:
     """
     Форматировать тип транзакции в читаемый вид.
     
     Args:
         transaction_type: Тип транзакции
+        _: Функция перевода для текущего языка
         
     Returns:
-        Читаемое название типа транзакции
+        Читаемое название типа транзакции (или сам тип, если он
+        неизвестен или функция перевода не передана)
     """
-    type_names = {
-        "balance_add": "Пополнение баланса",
-        "balance_deduct": "Списание с баланса",
-        "subscription_purchase": "Покупка подписки",
-        "refund": "Возврат средств",
-        "gift_sent": "Отправка подарка",
-        "gift_received": "Получение подарка"
-    }
-    return type_names.get(transaction_type, transaction_type)
+    key = _TX_TYPE_KEYS.get(transaction_type)
+    if key is None or _ is None:
+        return transaction_type
+    return _(key)
 
 
 def format_amount_with_sign(amount_kopeks: int) -> str:
@@ -86,6 +98,6 @@ def format_amount_with_sign(amount_kopeks: int) -> str:
         >>> format_amount_with_sign(-5000)
         '-50.00 ₽'
     """
-    sign = "+" if amount_kopeks >= 0 else ""
-    rubles = amount_kopeks / 100
-    return f"{sign}{rubles:.2f} ₽"
\ No newline at end of file
+    sign = "+" if amount_kopeks >= 0 else "-"
+    rubles, rest = divmod(abs(amount_kopeks), 100)
+    return f"{sign}{rubles}.{rest:02d} ₽"
\ No newline at end of file
@@ -17,6 +17,26 @@ class Settings(BaseSettings):
     POSTGRES_PORT: int = Field(default=5432)
     POSTGRES_DB: str = Field(default="vpn_shop_db")
 
+    # Database connection pool
+    DB_TARGET_CONCURRENCY: int = Field(
+        default=100,
+        description="Expected concurrent DB requests, used to size the pool")
+    DB_POOL_SIZE: Optional[int] = Field(
+        default=None,
+        description="Explicit pool size; derived from DB_TARGET_CONCURRENCY if unset")
+    DB_MAX_OVERFLOW: Optional[int] = Field(
+        default=None,
+        description="Explicit pool overflow; derived from DB_TARGET_CONCURRENCY if unset")
+    DB_STRICT_NETWORK: bool = Field(
+        default=False,
+        description="Ping pooled connections on checkout (NAT/firewall between bot and DB)")
+    DB_JIT: str = Field(
+        default="on",
+        description="PostgreSQL jit setting for bot connections")
+    DB_POOL_USE_LIFO: bool = Field(
+        default=True,
+        description="Reuse the most recently returned connection first")
+
     # Redis Configuration
     REDIS_HOST: str = Field(default="localhost")
     REDIS_PORT: int = Field(default=6379)
@@ -25,6 +25,22 @@ async def get_active_subscription_by_user_id(
     return result.scalars().first()
 
 
+async def count_active_subscriptions(
+        session: AsyncSession,
+        user_id: int,
+        panel_user_uuid: Optional[str] = None) -> int:
+    """Count active, non-expired subscriptions without loading them."""
+    stmt = select(func.count()).select_from(Subscription).where(
+        Subscription.user_id == user_id,
+        Subscription.is_active == True,
+        Subscription.end_date > datetime.now(timezone.utc),
+    )
+    if panel_user_uuid:
+        stmt = stmt.where(Subscription.panel_user_uuid == panel_user_uuid)
+    result = await session.execute(stmt)
+    return result.scalar_one()
+
+
 async def get_subscription_by_panel_subscription_uuid(
         session: AsyncSession, panel_sub_uuid: str) -> Optional[Subscription]:
     stmt = select(Subscription).where(
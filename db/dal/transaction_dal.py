@@ -2,12 +2,16 @@
 Data Access Layer для работы с транзакциями пользователей.
 """
 import logging
-from typing import Optional, List
-from sqlalchemy import select, desc
+from datetime import datetime
+from typing import Optional, List, Tuple
+from sqlalchemy import select, desc, asc, insert, tuple_
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.models import Transaction
 
+logger = logging.getLogger(__name__)
+
 
 async def create_transaction(
     session: AsyncSession,
@@ -29,19 +33,22 @@ async def create_transaction(
     Returns:
         Созданная транзакция
     """
-    transaction = Transaction(
-        user_id=user_id,
-        amount_kopeks=amount_kopeks,
-        transaction_type=transaction_type,
-        description=description
+    # Один INSERT ... RETURNING возвращает id и created_at без flush/refresh
+    stmt = (
+        insert(Transaction)
+        .values(
+            user_id=user_id,
+            amount_kopeks=amount_kopeks,
+            transaction_type=transaction_type,
+            description=description
+        )
+        .returning(Transaction)
     )
-    session.add(transaction)
-    await session.flush()
-    await session.refresh(transaction)
+    transaction = await session.scalar(stmt)
     
-    logging.info(
-        f"Transaction created: id={transaction.id}, user_id={user_id}, "
-        f"amount={amount_kopeks}, type={transaction_type}"
+    logger.info(
+        "Transaction created: id=%s, user_id=%s, amount=%s, type=%s",
+        transaction.id, user_id, amount_kopeks, transaction_type
     )
     
     return transaction
@@ -51,29 +58,53 @@ async def get_user_transactions(
     session: AsyncSession,
     user_id: int,
     limit: int = 10,
-    offset: int = 0
-) -> List[Transaction]:
+    before: Optional[Tuple[datetime, int]] = None,
+    after: Optional[Tuple[datetime, int]] = None
+) -> List[Row]:
     """
-    Получить историю транзакций пользователя.
+    Получить историю транзакций пользователя (keyset-пагинация).
+    
+    Курсор — пара (created_at, id) граничной транзакции. Поиск идет по
+    индексу (user_id, created_at DESC) независимо от глубины страницы.
+    Возвращаются легкие Row-кортежи без ORM-объектов: история только
+    отображается и не изменяется.
     
     Args:
         session: Асинхронная сессия БД
         user_id: ID пользователя
         limit: Максимальное количество записей
-        offset: Смещение для пагинации
+        before: Вернуть транзакции старше курсора
+        after: Вернуть транзакции новее курсора
         
     Returns:
-        Список транзакций
+        Строки (id, amount_kopeks, transaction_type, description, created_at),
+        от новых к старым
     """
-    query = (
-        select(Transaction)
-        .where(Transaction.user_id == user_id)
-        .order_by(desc(Transaction.created_at))
-        .limit(limit)
-        .offset(offset)
-    )
-    result = await session.execute(query)
-    return list(result.scalars().all())
+    position = tuple_(Transaction.created_at, Transaction.id)
+    query = select(
+        Transaction.id,
+        Transaction.amount_kopeks,
+        Transaction.transaction_type,
+        Transaction.description,
+        Transaction.created_at
+    ).where(Transaction.user_id == user_id)
+    
+    if after is not None:
+        query = query.where(position > tuple_(*after)).order_by(
+            asc(Transaction.created_at), asc(Transaction.id)
+        )
+    else:
+        if before is not None:
+            query = query.where(position < tuple_(*before))
+        query = query.order_by(
+            desc(Transaction.created_at), desc(Transaction.id)
+        )
+    
+    result = await session.execute(query.limit(limit))
+    transactions = list(result.all())
+    if after is not None:
+        transactions.reverse()
+    return transactions
 
 
 async def get_transaction_by_id(
@@ -69,11 +69,52 @@ async def ensure_referral_code(session: AsyncSession, user: User) -> str:
 
 
 async def get_user_by_id(session: AsyncSession, user_id: int) -> Optional[User]:
-    stmt = select(User).where(User.user_id == user_id)
+    # Primary-key lookup is served from the session identity map when the
+    # user was already loaded during this update (e.g. by I18nMiddleware).
+    return await session.get(User, user_id)
+
+
+async def get_user_with_active_subscription(
+    session: AsyncSession, user_id: int
+) -> Optional[User]:
+    """Load a user with ``user.active_subscription`` eagerly populated."""
+    stmt = (
+        select(User)
+        .where(User.user_id == user_id)
+        .options(selectinload(User.active_subscription))
+    )
     result = await session.execute(stmt)
     return result.scalar_one_or_none()
 
 
+async def get_profile_summary(
+    session: AsyncSession, user_id: int
+) -> Optional[Tuple[int, bool]]:
+    """Return (balance_kopeks, has_active_subscription) for a user.
+
+    A single scalar query: no User/Subscription objects are hydrated.
+    Returns None if the user does not exist.
+    """
+    has_active_subscription = (
+        select(Subscription.subscription_id)
+        .where(
+            Subscription.user_id == User.user_id,
+            Subscription.panel_user_uuid == User.panel_user_uuid,
+            Subscription.is_active == True,
+            Subscription.end_date > datetime.now(timezone.utc),
+        )
+        .exists()
+    )
+    stmt = select(
+        User.balance_kopeks, has_active_subscription.label("has_active_subscription")
+    ).where(User.user_id == user_id)
+    result = await session.execute(stmt)
+    row = result.first()
+    if row is None:
+        return None
+    return row.balance_kopeks, bool(row.has_active_subscription)
+
+
 async def get_user_by_username(session: AsyncSession, username: str) -> Optional[User]:
     clean_username = username.lstrip("@").lower()
     stmt = select(User).where(func.lower(User.username) == clean_username)
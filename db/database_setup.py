@@ -1,10 +1,11 @@
 import logging
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 
 from config.settings import Settings
 from .models import Base
 from .migrator import run_database_migrations
+from .optimization.connection_pool import setup_connection_pool
 
 async_engine = None
 
@@ -16,10 +17,14 @@ def init_db_connection(settings: Settings) -> sessionmaker:
         logging.info(
             f"Attempting to create SQLAlchemy engine with URL: {settings.DATABASE_URL}"
         )
-        async_engine = create_async_engine(
+        async_engine = setup_connection_pool(
             settings.DATABASE_URL,
-            echo=False,
-            pool_pre_ping=True,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            strict_network=settings.DB_STRICT_NETWORK,
+            pool_use_lifo=settings.DB_POOL_USE_LIFO,
+            target_concurrency=settings.DB_TARGET_CONCURRENCY,
+            jit_mode=settings.DB_JIT,
         )
 
     local_async_session_factory = async_sessionmaker(
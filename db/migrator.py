@@ -112,6 +112,53 @@ def _migration_0003_normalize_referral_codes(connection: Connection) -> None:
         )
     )
 
+
+def _migration_0004_add_transaction_history_indexes(connection: Connection) -> None:
+    inspector = inspect(connection)
+    if not inspector.has_table("transactions"):
+        return
+
+    connection.execute(
+        text(
+            """
+            CREATE INDEX IF NOT EXISTS ix_tx_user_created
+            ON transactions (user_id, created_at DESC)
+            """
+        )
+    )
+    connection.execute(
+        text(
+            """
+            CREATE INDEX IF NOT EXISTS ix_tx_user_type_created
+            ON transactions (user_id, transaction_type, created_at DESC)
+            """
+        )
+    )
+
+
+def _migration_0005_add_balance_non_negative_check(connection: Connection) -> None:
+    exists = connection.execute(
+        text(
+            """
+            SELECT 1 FROM pg_constraint
+            WHERE conname = 'ck_users_balance_non_negative'
+            """
+        )
+    ).first()
+    if exists:
+        return
+
+    # NOT VALID: enforce for new writes without scanning/blocking existing rows
+    connection.execute(
+        text(
+            """
+            ALTER TABLE users
+            ADD CONSTRAINT ck_users_balance_non_negative
+            CHECK (balance_kopeks >= 0) NOT VALID
+            """
+        )
+    )
+
 MIGRATIONS: List[Migration] = [
     Migration(
         id="0001_add_channel_subscription_fields",
@@ -128,6 +175,16 @@ MIGRATIONS: List[Migration] = [
         description="Normalize referral codes to uppercase for consistent lookups",
         upgrade=_migration_0003_normalize_referral_codes,
     ),
+    Migration(
+        id="0004_add_transaction_history_indexes",
+        description="Composite indexes for paginated transaction history lookups",
+        upgrade=_migration_0004_add_transaction_history_indexes,
+    ),
+    Migration(
+        id="0005_add_balance_non_negative_check",
+        description="Forbid negative user balances at the database level",
+        upgrade=_migration_0005_add_balance_non_negative_check,
+    ),
 ]
 
 
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, Float, ForeignKey, UniqueConstraint, Text, BigInteger
+from sqlalchemy import and_, create_engine, Column, Integer, String, Boolean, DateTime, Float, ForeignKey, UniqueConstraint, Text, BigInteger, Index, CheckConstraint
 from sqlalchemy.orm import relationship, DeclarativeBase
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.sql import func
@@ -54,6 +54,23 @@ class User(Base):
     transactions = relationship("Transaction",
                                back_populates="user",
                                cascade="all, delete-orphan")
+    # Current subscription on the user's panel account, for selectinload().
+    # Latest end_date wins if several active rows exist.
+    active_subscription = relationship(
+        "Subscription",
+        primaryjoin=lambda: and_(
+            User.user_id == Subscription.user_id,
+            User.panel_user_uuid == Subscription.panel_user_uuid,
+            Subscription.is_active == True,
+            Subscription.end_date > func.now(),
+        ),
+        foreign_keys="Subscription.user_id",
+        order_by=lambda: Subscription.end_date.desc(),
+        uselist=False,
+        viewonly=True)
+
+    __table_args__ = (CheckConstraint("balance_kopeks >= 0",
+                                      name="ck_users_balance_non_negative"), )
 
     def __repr__(self):
         return f"<User(user_id={self.user_id}, username='{self.username}')>"
@@ -285,5 +302,11 @@ class Transaction(Base):
     # Relationships
     user = relationship("User", back_populates="transactions")
     
+    # Пагинация истории: WHERE user_id = ? [AND transaction_type = ?] ORDER BY created_at DESC
+    __table_args__ = (
+        Index("ix_tx_user_created", user_id, created_at.desc()),
+        Index("ix_tx_user_type_created", user_id, transaction_type, created_at.desc()),
+    )
+    
     def __repr__(self):
         return f"<Transaction(id={self.id}, user_id={self.user_id}, amount={self.amount_kopeks}, type='{self.transaction_type}')>"
\ No newline at end of file
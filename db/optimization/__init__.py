@@ -6,6 +6,17 @@
 """
 
 from .query_optimizer import QueryOptimizer
-from .connection_pool import setup_connection_pool
+from .connection_pool import (
+    pool_capacity,
+    prewarm_tables,
+    setup_connection_pool,
+    warm_up_connection_pool,
+)
 
-__all__ = ['QueryOptimizer', 'setup_connection_pool']
\ No newline at end of file
+__all__ = [
+    'QueryOptimizer',
+    'pool_capacity',
+    'prewarm_tables',
+    'setup_connection_pool',
+    'warm_up_connection_pool',
+]
\ No newline at end of file
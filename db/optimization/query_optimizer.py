@@ -5,16 +5,150 @@
 добавления индексов и мониторинга медленных запросов.
 """
 
+import asyncio
 import logging
 import os
+import sys
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any, FrozenSet, Sequence, Tuple
 
 from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
 from sqlalchemy.ext.asyncio import AsyncSession, AsyncEngine
 
 logger = logging.getLogger(__name__)
 
+INDEXES_FILE = Path(__file__).parent / "indexes.sql"
+
+# Колонки, для которых индекс предлагается в первую очередь
+COMMON_INDEX_COLUMNS = frozenset({
+    'id', 'user_id', 'created_at', 'updated_at',
+    'status', 'is_active', 'telegram_id'
+})
+# Тот же набор для передачи массивом в _Q_SUGGEST
+_COMMON_INDEX_COLUMNS_ARRAY = sorted(COMMON_INDEX_COLUMNS)
+
+# Запросы к каталогу и статистике компилируются один раз при импорте
+_Q_TABLES = text("""
+    SELECT table_name
+    FROM information_schema.tables
+    WHERE table_schema = current_schema()
+    AND table_type = 'BASE TABLE'
+""")
+
+_Q_PG_STAT_STATEMENTS = text("""
+    SELECT 
+        query,
+        calls,
+        total_exec_time as total_time,
+        mean_exec_time as mean_time,
+        max_exec_time as max_time,
+        stddev_exec_time as stddev_time,
+        rows
+    FROM pg_stat_statements
+    WHERE mean_exec_time > :threshold
+    ORDER BY mean_exec_time DESC
+    LIMIT :lim
+""")
+
+# Колонки без индекса, которые стоит проиндексировать: часто
+# используемые и внешние ключи (*_id)
+_Q_SUGGEST = text("""
+    WITH cols AS (
+        SELECT a.attname
+        FROM pg_attribute a
+        WHERE a.attrelid = CAST(:table_name AS regclass)
+        AND a.attnum > 0
+        AND NOT a.attisdropped
+    ),
+    idx AS (
+        SELECT a.attname
+        FROM pg_index ix
+        JOIN pg_attribute a ON a.attrelid = ix.indrelid AND a.attnum = ANY(ix.indkey)
+        WHERE ix.indrelid = CAST(:table_name AS regclass)
+    )
+    SELECT c.attname
+    FROM cols c
+    WHERE NOT EXISTS (SELECT 1 FROM idx WHERE idx.attname = c.attname)
+    AND (c.attname = ANY(:common) OR c.attname LIKE '%\\_id')
+""")
+
+_Q_PG_STAT_USER_TABLES = text("""
+    SELECT 
+        schemaname,
+        relname as tablename,
+        n_tup_ins as inserts,
+        n_tup_upd as updates,
+        n_tup_del as deletes,
+        n_live_tup as live_tuples,
+        n_dead_tup as dead_tuples,
+        last_vacuum,
+        last_autovacuum,
+        last_analyze,
+        last_autoanalyze
+    FROM pg_stat_user_tables
+    WHERE relname = :table_name
+""")
+
+
+@lru_cache(maxsize=1)
+def _load_indexes_sql(path: Path, mtime: float) -> List[TextClause]:
+    """
+    Чтение indexes.sql и разбиение на отдельные выражения.
+    
+    Результат кэшируется по времени изменения файла, поэтому файл
+    перечитывается только после его правки.
+    
+    Args:
+        path: Путь к файлу индексов
+        mtime: Время изменения файла (ключ кэша)
+        
+    Returns:
+        Список скомпилированных SQL выражений
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = [
+            line for line in f
+            if not line.lstrip().startswith("--")
+        ]
+    
+    # Файл содержит только DDL без строк и тел функций с ";"
+    return [
+        text(statement.strip())
+        for statement in "".join(lines).split(";")
+        if statement.strip()
+    ]
+
+
+@lru_cache(maxsize=256)
+def _explain_statement(query: str) -> TextClause:
+    """
+    EXPLAIN ANALYZE обертка над запросом, кэшируется по тексту запроса.
+    
+    Args:
+        query: SQL запрос для анализа
+        
+    Returns:
+        Скомпилированное EXPLAIN выражение
+    """
+    return text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}")
+
+
+@lru_cache(maxsize=64)
+def _vacuum_statement(tables: Tuple[str, ...]) -> TextClause:
+    """
+    Один VACUUM (ANALYZE) для списка таблиц с экранированными идентификаторами.
+    
+    Args:
+        tables: Имена таблиц
+        
+    Returns:
+        Скомпилированное VACUUM выражение
+    """
+    quoted = ", ".join('"' + name.replace('"', '""') + '"' for name in tables)
+    return text(f"VACUUM (ANALYZE) {quoted}")
+
 
 class QueryOptimizer:
     """
@@ -36,6 +170,33 @@ class QueryOptimizer:
         """
         self.engine = engine
         self.slow_query_threshold = 1.0  # секунды
+        self._tables: Optional[FrozenSet[str]] = None
+    
+    async def load_table_whitelist(self, session: AsyncSession) -> FrozenSet[str]:
+        """
+        Загрузка списка существующих таблиц текущей схемы.
+        
+        Args:
+            session: Сессия базы данных
+            
+        Returns:
+            Множество имен таблиц
+        """
+        result = await session.execute(_Q_TABLES)
+        self._tables = frozenset(sys.intern(row[0]) for row in result)
+        return self._tables
+    
+    async def _check_table(self, session: AsyncSession, table_name: str) -> None:
+        """
+        Проверка имени таблицы по списку существующих таблиц.
+        
+        Raises:
+            ValueError: Если таблицы нет в текущей схеме
+        """
+        if self._tables is None:
+            await self.load_table_whitelist(session)
+        if table_name not in self._tables:
+            raise ValueError(f"Неизвестная таблица: {table_name!r}")
     
     async def add_indexes(self, session: AsyncSession) -> bool:
         """
@@ -48,23 +209,34 @@ class QueryOptimizer:
             True если успешно, False иначе
         """
         try:
-            # Получаем путь к файлу indexes.sql
-            current_dir = Path(__file__).parent
-            indexes_file = current_dir / "indexes.sql"
+            indexes_file = INDEXES_FILE
             
             if not indexes_file.exists():
                 logger.error(f"Файл индексов не найден: {indexes_file}")
                 return False
             
-            # Читаем SQL файл
-            with open(indexes_file, 'r', encoding='utf-8') as f:
-                sql_content = f.read()
+            statements = _load_indexes_sql(indexes_file, indexes_file.stat().st_mtime)
             
-            # Выполняем SQL
+            # Каждое выражение в своей точке сохранения: ошибка в одном
+            # (например, отсутствующая таблица) не откатывает остальные
             logger.info("Применение индексов из indexes.sql")
-            await session.execute(text(sql_content))
+            failed = 0
+            for statement in statements:
+                try:
+                    async with session.begin_nested():
+                        await session.execute(statement)
+                except Exception as e:
+                    failed += 1
+                    logger.warning("Не удалось выполнить %r: %s", statement.text, e)
             await session.commit()
             
+            if failed:
+                logger.warning(
+                    "Индексы применены частично: %d из %d выражений с ошибкой",
+                    failed, len(statements)
+                )
+                return False
+            
             logger.info("Индексы успешно применены")
             return True
             
@@ -91,12 +263,9 @@ class QueryOptimizer:
             Словарь с результатами анализа
         """
         try:
-            # Добавляем EXPLAIN ANALYZE
-            explain_query = f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}"
-            
-            # Выполняем запрос
+            # Выполняем запрос с EXPLAIN ANALYZE
             result = await session.execute(
-                text(explain_query),
+                _explain_statement(query),
                 params or {}
             )
             
@@ -127,55 +296,46 @@ class QueryOptimizer:
     async def find_slow_queries(
         self,
         session: AsyncSession,
-        threshold_ms: float = 1000.0
-    ) -> List[Dict[str, Any]]:
+        threshold_ms: float = 1000.0,
+        limit: int = 50
+    ) -> AsyncIterator[Dict[str, Any]]:
         """
         Поиск медленных запросов в pg_stat_statements.
         
+        Результаты читаются серверным курсором и отдаются по мере
+        поступления. Метод — асинхронный генератор, а не корутина со
+        списком: используйте ``async for`` (или ``[r async for r in ...]``).
+        При досрочном прерывании оборачивайте вызов в
+        ``contextlib.aclosing``, чтобы курсор закрылся сразу, а не при
+        сборке мусора.
+        
         Args:
             session: Сессия базы данных
             threshold_ms: Порог времени выполнения в миллисекундах
+            limit: Максимальное количество запросов
             
-        Returns:
-            Список медленных запросов
+        Yields:
+            Словари с информацией о медленных запросах
         """
+        found = 0
         try:
-            query = text("""
-                SELECT 
-                    query,
-                    calls,
-                    total_exec_time,
-                    mean_exec_time,
-                    max_exec_time,
-                    stddev_exec_time,
-                    rows
-                FROM pg_stat_statements
-                WHERE mean_exec_time > :threshold
-                ORDER BY mean_exec_time DESC
-                LIMIT 50
-            """)
-            
-            result = await session.execute(query, {"threshold": threshold_ms})
-            rows = result.fetchall()
-            
-            slow_queries = []
-            for row in rows:
-                slow_queries.append({
-                    'query': row[0],
-                    'calls': row[1],
-                    'total_time': row[2],
-                    'mean_time': row[3],
-                    'max_time': row[4],
-                    'stddev_time': row[5],
-                    'rows': row[6]
-                })
-            
-            logger.info(f"Найдено {len(slow_queries)} медленных запросов")
-            return slow_queries
-            
+            result = await session.stream(
+                _Q_PG_STAT_STATEMENTS,
+                {"threshold": threshold_ms, "lim": limit}
+            )
         except Exception as e:
             logger.warning(f"pg_stat_statements недоступен: {e}")
-            return []
+            return
+        
+        try:
+            async for row in result.mappings():
+                found += 1
+                yield dict(row)
+        finally:
+            # Закрываем серверный курсор и при досрочном выходе из обхода
+            await result.close()
+        
+        logger.info(f"Найдено {found} медленных запросов")
     
     async def suggest_indexes(
         self,
@@ -192,67 +352,18 @@ class QueryOptimizer:
         Returns:
             Список предложений по индексам
         """
-        suggestions = []
+        await self._check_table(session, table_name)
         
         try:
-            # Получаем информацию о таблице
-            query = text("""
-                SELECT 
-                    a.attname as column_name,
-                    t.typname as data_type,
-                    a.attnotnull as not_null
-                FROM pg_attribute a
-                JOIN pg_type t ON a.atttypid = t.oid
-                WHERE a.attrelid = :table_name::regclass
-                AND a.attnum > 0
-                AND NOT a.attisdropped
-                ORDER BY a.attnum
-            """)
-            
-            result = await session.execute(query, {"table_name": table_name})
-            columns = result.fetchall()
-            
-            # Проверяем существующие индексы
-            index_query = text("""
-                SELECT 
-                    i.relname as index_name,
-                    a.attname as column_name
-                FROM pg_index ix
-                JOIN pg_class i ON i.oid = ix.indexrelid
-                JOIN pg_attribute a ON a.attrelid = ix.indrelid AND a.attnum = ANY(ix.indkey)
-                WHERE ix.indrelid = :table_name::regclass
-            """)
-            
-            index_result = await session.execute(index_query, {"table_name": table_name})
-            existing_indexes = {row[1] for row in index_result.fetchall()}
-            
-            # Предлагаем индексы для часто используемых колонок
-            common_index_columns = [
-                'id', 'user_id', 'created_at', 'updated_at',
-                'status', 'is_active', 'telegram_id'
+            result = await session.execute(
+                _Q_SUGGEST,
+                {"table_name": table_name, "common": _COMMON_INDEX_COLUMNS_ARRAY}
+            )
+            suggestions = [
+                f"CREATE INDEX idx_{table_name}_{column_name} ON {table_name}({column_name});"
+                for column_name in map(sys.intern, result.scalars())
             ]
             
-            for column in columns:
-                column_name = column[0]
-                
-                # Пропускаем, если индекс уже существует
-                if column_name in existing_indexes:
-                    continue
-                
-                # Предлагаем индекс для часто используемых колонок
-                if column_name in common_index_columns:
-                    suggestions.append(
-                        f"CREATE INDEX idx_{table_name}_{column_name} "
-                        f"ON {table_name}({column_name});"
-                    )
-                
-                # Предлагаем индекс для внешних ключей
-                if column_name.endswith('_id'):
-                    suggestions.append(
-                        f"CREATE INDEX idx_{table_name}_{column_name} "
-                        f"ON {table_name}({column_name});"
-                    )
-            
             logger.info(f"Предложено {len(suggestions)} индексов для {table_name}")
             return suggestions
             
@@ -275,21 +386,30 @@ class QueryOptimizer:
         Returns:
             True если успешно, False иначе
         """
-        try:
-            logger.info(f"Оптимизация таблицы {table_name}")
-            
-            # VACUUM ANALYZE нельзя выполнить в транзакции
-            await session.commit()
-            
-            # Выполняем VACUUM ANALYZE
-            await session.execute(text(f"VACUUM ANALYZE {table_name}"))
+        return await self.vacuum_many(session, [table_name])
+    
+    async def vacuum_many(
+        self,
+        session: AsyncSession,
+        tables: Sequence[str]
+    ) -> bool:
+        """
+        VACUUM ANALYZE нескольких таблиц одним выражением.
+        
+        Args:
+            session: Сессия базы данных (для проверки имен таблиц)
+            tables: Имена таблиц
             
-            logger.info(f"Таблица {table_name} оптимизирована")
-            return True
+        Returns:
+            True если успешно, False иначе
             
-        except Exception as e:
-            logger.error(f"Ошибка оптимизации таблицы {table_name}: {e}", exc_info=True)
-            return False
+        Raises:
+            ValueError: Если какой-либо таблицы нет в текущей схеме
+        """
+        for table_name in tables:
+            await self._check_table(session, table_name)
+        
+        return await self._run_vacuum(tuple(tables))
     
     async def get_table_stats(
         self,
@@ -306,25 +426,10 @@ class QueryOptimizer:
         Returns:
             Словарь со статистикой
         """
+        await self._check_table(session, table_name)
+        
         try:
-            query = text("""
-                SELECT 
-                    schemaname,
-                    tablename,
-                    n_tup_ins as inserts,
-                    n_tup_upd as updates,
-                    n_tup_del as deletes,
-                    n_live_tup as live_tuples,
-                    n_dead_tup as dead_tuples,
-                    last_vacuum,
-                    last_autovacuum,
-                    last_analyze,
-                    last_autoanalyze
-                FROM pg_stat_user_tables
-                WHERE tablename = :table_name
-            """)
-            
-            result = await session.execute(query, {"table_name": table_name})
+            result = await session.execute(_Q_PG_STAT_USER_TABLES, {"table_name": table_name})
             row = result.fetchone()
             
             if row:
@@ -348,10 +453,46 @@ class QueryOptimizer:
             logger.error(f"Ошибка получения статистики таблицы: {e}", exc_info=True)
             return {}
     
+    async def _run_vacuum(
+        self,
+        tables: Tuple[str, ...]
+    ) -> bool:
+        """
+        VACUUM (ANALYZE) таблиц на отдельном autocommit соединении.
+        
+        VACUUM нельзя выполнить внутри транзакции, поэтому сессия
+        вызывающего кода не используется.
+        
+        Args:
+            tables: Имена таблиц (уже проверенные)
+            
+        Returns:
+            True если успешно, False иначе
+        """
+        if not tables:
+            return True
+        
+        names = ", ".join(tables)
+        try:
+            logger.info(f"Оптимизация таблиц: {names}")
+            async with self.engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await conn.execute(_vacuum_statement(tables))
+            logger.info(f"Таблицы оптимизированы: {names}")
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка оптимизации таблиц {names}: {e}", exc_info=True)
+            return False
+    
     async def optimize_all_tables(self, session: AsyncSession) -> Dict[str, bool]:
         """
         Оптимизация всех таблиц.
         
+        Существующие таблицы делятся на группы (не более 4), каждая
+        группа обрабатывается одним VACUUM (ANALYZE) на отдельном
+        соединении, группы выполняются параллельно. Отсутствующие в
+        схеме таблицы помечаются как False.
+        
         Args:
             session: Сессия базы данных
             
@@ -364,8 +505,20 @@ class QueryOptimizer:
             'ads', 'panel_sync_log'
         ]
         
-        results = {}
-        for table in tables:
-            results[table] = await self.optimize_table(session, table)
+        if self._tables is None:
+            await self.load_table_whitelist(session)
+        existing = [table for table in tables if table in self._tables]
+        results = {table: False for table in tables}
+        if not existing:
+            return results
+        
+        workers = min(4, len(existing))
+        batches = [tuple(existing[i::workers]) for i in range(workers)]
+        outcomes = await asyncio.gather(
+            *(self._run_vacuum(batch) for batch in batches)
+        )
         
+        for batch, success in zip(batches, outcomes):
+            for table in batch:
+                results[table] = success
         return results
\ No newline at end of file
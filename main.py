@@ -4,6 +4,9 @@
 """
 import asyncio
 import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 from aiogram import Bot, Dispatcher
@@ -15,13 +18,28 @@ from bot.routers import setup_routers
 from db.database_setup import init_db
 
 
-# Настройка логирования
+# Настройка логирования: event loop только кладет записи в очередь,
+# форматирование и запись в stderr выполняет поток QueueListener
+log_queue = queue.SimpleQueue()
+stream_handler = logging.StreamHandler()
+stream_handler.setFormatter(
+    logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+)
 logging.basicConfig(
     level=getattr(logging, settings.LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    handlers=[QueueHandler(log_queue)]
 )
+log_listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
 logger = logging.getLogger(__name__)
 
+# uvloop ускоряет сокетный I/O всего бота: long polling aiogram и asyncpg
+if sys.platform != "win32":
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        logger.debug("uvloop не установлен, используется стандартный event loop")
+
 
 async def main():
     """Главная функция запуска бота"""
@@ -42,19 +60,26 @@ async def main():
     logger.info("Настройка обработчиков...")
     setup_routers(dp)
     
+    # Типы обновлений вычисляются один раз после регистрации обработчиков
+    allowed_updates = dp.resolve_used_update_types()
+    logger.info("Используемые типы обновлений: %s", ", ".join(allowed_updates))
+    
     # Запуск бота
     try:
         logger.info("Бот запущен и готов к работе!")
-        await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+        await dp.start_polling(bot, allowed_updates=allowed_updates)
     finally:
         await bot.session.close()
         logger.info("Бот остановлен")
 
 
 if __name__ == "__main__":
+    log_listener.start()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Получен сигнал остановки")
     except Exception as e:
-        logger.exception(f"Критическая ошибка: {e}")
\ No newline at end of file
+        logger.exception("Критическая ошибка: %s", e)
+    finally:
+        log_listener.stop()
\ No newline at end of file
@@ -5,28 +5,157 @@
 - FileHandler с ротацией
 - StreamHandler для консоли
 - SysLogHandler для централизованного логирования
-- Фильтры для чувствительных данных
+- Фильтры и форматтер для чувствительных данных
+- QueueHandler для вынесения записи логов в фоновый поток
+- MemoryHandler для пакетной записи в файлы
 """
 
-from typing import Optional, List
+from typing import Optional, List, Union
+import atexit
+import copy
+import gzip
 import logging
 import logging.handlers
+import os
+import queue
 import re
+import shutil
+import subprocess
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from types import MappingProxyType
+
+
+# Имена уровней логирования -> числовые значения
+_LEVELS = MappingProxyType(logging.getLevelNamesMapping())
+
+
+def resolve_log_level(level: Union[str, int]) -> int:
+    """
+    Числовое значение уровня логирования.
+    
+    Args:
+        level: Имя уровня (в любом регистре) или число
+    
+    Returns:
+        Числовой уровень
+    """
+    if isinstance(level, int):
+        return level
+    return _LEVELS[level if level.isupper() else level.upper()]
 
 
 # Список полей с чувствительными данными
 SENSITIVE_PATTERNS = [
-    r'password["\']?\s*[:=]\s*["\']?[\w\d]+',
-    r'token["\']?\s*[:=]\s*["\']?[\w\d\-_]+',
-    r'api[_-]?key["\']?\s*[:=]\s*["\']?[\w\d\-_]+',
-    r'secret["\']?\s*[:=]\s*["\']?[\w\d\-_]+',
-    r'authorization["\']?\s*[:=]\s*["\']?[\w\d\-_\s]+',
-    r'bearer\s+[\w\d\-_\.]+',
-    r'\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}',  # Credit card
-    r'\d{3}-\d{2}-\d{4}',  # SSN
+    # Повторения ограничены, а \s не входит в повторяемые классы значений,
+    # чтобы длинные сообщения не вызывали катастрофический backtracking
+    r'password["\']?\s{0,16}[:=]\s{0,16}["\']?\w{1,256}',
+    r'token["\']?\s{0,16}[:=]\s{0,16}["\']?[\w\-]{1,256}',
+    r'api[_-]?key["\']?\s{0,16}[:=]\s{0,16}["\']?[\w\-]{1,256}',
+    r'secret["\']?\s{0,16}[:=]\s{0,16}["\']?[\w\-]{1,256}',
+    r'authorization["\']?\s{0,16}[:=]\s{0,16}["\']?[\w\-]{1,256}(?:[ \t]{1,16}[\w\-\.=]{1,1024})?',
+    r'bearer\s{1,16}[\w\-\.]{1,1024}',
+    r'\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b',  # Credit card
+    r'\b\d{3}-\d{2}-\d{4}\b',  # SSN
 ]
 
+# Быстрая предварительная проверка: без этих подстрок и без трех цифр
+# подряд ни один из SENSITIVE_PATTERNS совпасть не может
+_SENSITIVE_KEYWORDS = ('password', 'token', 'api', 'secret', 'authorization', 'bearer')
+_DIGIT_RUN = re.compile(r'\d{3}')
+
+# Все шаблоны одной альтернацией: один проход по строке вместо восьми.
+# Если установлен google-re2, используется его DFA с линейным временем
+# сопоставления, иначе стандартный re.
+_SENSITIVE_SOURCE = "(?i)" + "|".join(f"(?:{pattern})" for pattern in SENSITIVE_PATTERNS)
+try:
+    import re2
+    _SENSITIVE_RE = re2.compile(_SENSITIVE_SOURCE)
+except ImportError:
+    _SENSITIVE_RE = re.compile(_SENSITIVE_SOURCE)
+
+# Hyperscan (если установлен) сопоставляет все шаблоны одной SIMD базой.
+# Scratch базы нельзя использовать из нескольких потоков одновременно.
+# Без HS_FLAG_UCP \w в Hyperscan только ASCII, а в re — Unicode, поэтому
+# строки с не-ASCII символами всегда проверяются через _SENSITIVE_RE.
+try:
+    import hyperscan
+    _HS_DB = hyperscan.Database()
+    _HS_DB.compile(
+        expressions=[pattern.encode() for pattern in SENSITIVE_PATTERNS],
+        ids=list(range(len(SENSITIVE_PATTERNS))),
+        elements=len(SENSITIVE_PATTERNS),
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST] * len(SENSITIVE_PATTERNS)
+    )
+    _HS_LOCK = threading.Lock()
+except Exception:
+    # Не установлен или не смог скомпилировать шаблоны
+    _HS_DB = None
+
+
+def _hyperscan_scrub(text: str) -> str:
+    """
+    Замена чувствительных данных по совпадениям Hyperscan.
+    
+    Hyperscan сообщает все совпадения (в том числе вложенные), поэтому
+    пересекающиеся интервалы объединяются перед заменой.
+    
+    Args:
+        text: Исходная строка
+    
+    Returns:
+        Строка с замаскированными данными (тот же объект, если замен не было)
+    """
+    data = text.encode('utf-8')
+    spans = []
+    
+    def on_match(pattern_id, start, end, flags, context):
+        spans.append((start, end))
+    
+    with _HS_LOCK:
+        _HS_DB.scan(data, match_event_handler=on_match)
+    if not spans:
+        return text
+    
+    spans.sort()
+    parts = []
+    position = 0
+    current_start, current_end = spans[0]
+    for start, end in spans[1:]:
+        if start <= current_end:
+            current_end = max(current_end, end)
+            continue
+        parts.append(data[position:current_start])
+        parts.append(b'[FILTERED]')
+        position = current_end
+        current_start, current_end = start, end
+    parts.append(data[position:current_start])
+    parts.append(b'[FILTERED]')
+    parts.append(data[current_end:])
+    return b''.join(parts).decode('utf-8', errors='replace')
+
+
+def scrub_sensitive_data(text: str) -> str:
+    """
+    Замена чувствительных данных в строке.
+    
+    Args:
+        text: Исходная строка
+    
+    Returns:
+        Строка с замаскированными данными (тот же объект, если замен не было)
+    """
+    low = text.casefold()
+    if not any(keyword in low for keyword in _SENSITIVE_KEYWORDS) and not _DIGIT_RUN.search(text):
+        return text
+    if _HS_DB is not None and text.isascii():
+        return _hyperscan_scrub(text)
+    scrubbed, count = _SENSITIVE_RE.subn('[FILTERED]', text)
+    return scrubbed if count else text
+
 
 class SensitiveDataFilter(logging.Filter):
     """Фильтр для удаления чувствительных данных из логов."""
@@ -39,7 +168,6 @@ class SensitiveDataFilter(logging.Filter):
             name: Имя фильтра
         """
         super().__init__(name)
-        self.patterns = [re.compile(pattern, re.IGNORECASE) for pattern in SENSITIVE_PATTERNS]
     
     def filter(self, record: logging.LogRecord) -> bool:
         """
@@ -53,22 +181,362 @@ class SensitiveDataFilter(logging.Filter):
         """
         # Фильтруем сообщение
         if hasattr(record, 'msg') and isinstance(record.msg, str):
-            for pattern in self.patterns:
-                record.msg = pattern.sub('[FILTERED]', record.msg)
+            record.msg = scrub_sensitive_data(record.msg)
         
-        # Фильтруем args
-        if hasattr(record, 'args') and record.args:
-            filtered_args = []
-            for arg in record.args:
+        # Фильтруем args; кортеж пересоздается только если что-то заменено
+        args = getattr(record, 'args', None)
+        if args and isinstance(args, tuple):
+            filtered_args = None
+            for index, arg in enumerate(args):
                 if isinstance(arg, str):
-                    for pattern in self.patterns:
-                        arg = pattern.sub('[FILTERED]', arg)
-                filtered_args.append(arg)
-            record.args = tuple(filtered_args)
+                    scrubbed = scrub_sensitive_data(arg)
+                    if scrubbed is not arg:
+                        if filtered_args is None:
+                            filtered_args = list(args)
+                        filtered_args[index] = scrubbed
+            if filtered_args is not None:
+                record.args = tuple(filtered_args)
         
         return True
 
 
+# Общий экземпляр фильтра для всех handlers процесса
+SENSITIVE_FILTER = SensitiveDataFilter()
+
+
+def get_sensitive_filter() -> SensitiveDataFilter:
+    """
+    Фабрика для dictConfig, возвращающая общий SENSITIVE_FILTER.
+    
+    Returns:
+        SensitiveDataFilter
+    """
+    return SENSITIVE_FILTER
+
+
+class SensitiveDataFormatter(logging.Formatter):
+    """
+    Форматтер, маскирующий чувствительные данные выводимых записей.
+    
+    Оборачивает другой форматтер и маскирует только записи, которые
+    handler действительно выводит. Сообщение (с подставленными args) и
+    traceback маскируются до форматирования: в JSON кавычки экранируются,
+    и шаблоны вида password": "..." по готовой строке уже не совпадают.
+    Готовая строка дополнительно маскируется целиком.
+    """
+    
+    def __init__(self, formatter: Optional[logging.Formatter] = None):
+        """
+        Инициализация форматтера.
+        
+        Args:
+            formatter: Оборачиваемый форматтер (по умолчанию стандартный)
+        """
+        super().__init__()
+        self.formatter = formatter or logging.Formatter()
+    
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        scrubbed = scrub_sensitive_data(message)
+        if scrubbed is not message:
+            record.msg = scrubbed
+            record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatter.formatException(record.exc_info)
+        if record.exc_text:
+            record.exc_text = scrub_sensitive_data(record.exc_text)
+        return scrub_sensitive_data(self.formatter.format(record))
+
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from pythonjsonlogger import jsonlogger
+    _JsonFormatter = jsonlogger.JsonFormatter
+except ImportError:
+    _JsonFormatter = None
+
+_JSON_FORMAT = '%(asctime)s %(name)s %(levelname)s %(message)s %(pathname)s %(lineno)d'
+_JSON_SHORT_FORMAT = '%(asctime)s %(name)s %(levelname)s %(message)s'
+
+
+class OrjsonFormatter(logging.Formatter):
+    """
+    JSON форматтер на orjson: одна запись — один JSON объект в строке.
+    
+    Сообщение и traceback маскируются до сериализации.
+    """
+    
+    def __init__(self, include_location: bool = True, datefmt: Optional[str] = None):
+        """
+        Инициализация форматтера.
+        
+        Args:
+            include_location: Добавлять путь к файлу и номер строки
+            datefmt: Не используется, время пишется как timestamp
+        """
+        super().__init__(datefmt=datefmt)
+        self.include_location = include_location
+    
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': record.created,
+            'name': record.name,
+            'level': record.levelname,
+            'msg': scrub_sensitive_data(record.getMessage()),
+        }
+        if self.include_location:
+            payload['path'] = record.pathname
+            payload['line'] = record.lineno
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exc_info'] = scrub_sensitive_data(record.exc_text)
+        if record.stack_info:
+            payload['stack_info'] = self.formatStack(record.stack_info)
+        return orjson.dumps(payload).decode()
+
+
+def get_json_formatter(
+    format: Optional[str] = None,
+    datefmt: Optional[str] = None,
+    include_location: bool = True
+) -> logging.Formatter:
+    """
+    Создать JSON форматтер.
+    
+    Используется orjson, если установлен, затем python-json-logger,
+    иначе стандартный текстовый форматтер. Подходит как фабрика '()'
+    для dictConfig.
+    
+    Args:
+        format: Формат для python-json-logger и стандартного форматтера
+        datefmt: Формат даты
+        include_location: Добавлять путь к файлу и номер строки
+    
+    Returns:
+        Форматтер
+    """
+    if orjson is not None:
+        return OrjsonFormatter(include_location=include_location, datefmt=datefmt)
+    if format is None:
+        format = _JSON_FORMAT if include_location else _JSON_SHORT_FORMAT
+    if _JsonFormatter is not None:
+        return _JsonFormatter(format, datefmt=datefmt)
+    # Fallback to standard formatter
+    return logging.Formatter(format, datefmt=datefmt)
+
+
+# Форматтеры создаются один раз при импорте и разделяются всеми handlers
+_STANDARD_FORMATTER = SensitiveDataFormatter(logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+))
+_DETAILED_FORMATTER = SensitiveDataFormatter(logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
+))
+if orjson is not None or _JsonFormatter is not None:
+    _JSON_FORMATTER = SensitiveDataFormatter(get_json_formatter())
+    _JSON_SHORT_FORMATTER = SensitiveDataFormatter(get_json_formatter(include_location=False))
+else:
+    # Fallback to standard formatter
+    _JSON_FORMATTER = _JSON_SHORT_FORMATTER = _STANDARD_FORMATTER
+
+
+def _select_formatter(
+    formatter: Optional[logging.Formatter],
+    use_json: bool,
+    json_formatter: logging.Formatter,
+    plain_formatter: logging.Formatter
+) -> logging.Formatter:
+    """
+    Выбрать форматтер handler с маскированием чувствительных данных.
+    
+    Args:
+        formatter: Форматтер, переданный вызывающим кодом
+        use_json: Использовать JSON формат
+        json_formatter: Готовый JSON форматтер
+        plain_formatter: Готовый текстовый форматтер
+    
+    Returns:
+        Форматтер для handler
+    """
+    if formatter:
+        return SensitiveDataFormatter(formatter)
+    return json_formatter if use_json else plain_formatter
+
+
+# MemoryHandler'ы, которые фоновый поток периодически сбрасывает на диск
+_buffered_handlers: "weakref.WeakSet[logging.handlers.MemoryHandler]" = weakref.WeakSet()
+_flusher_lock = threading.Lock()
+_flusher_thread: Optional[threading.Thread] = None
+
+BUFFER_FLUSH_INTERVAL = 1.0  # секунды
+
+
+def _flush_buffered_handlers() -> None:
+    while True:
+        time.sleep(BUFFER_FLUSH_INTERVAL)
+        for handler in list(_buffered_handlers):
+            try:
+                handler.flush()
+            except Exception:
+                pass
+
+
+class BatchingMemoryHandler(logging.handlers.MemoryHandler):
+    """
+    MemoryHandler, передающий буфер в target одной пачкой.
+    
+    Если target умеет писать пачку (FastRotatingFileHandler.handle_batch),
+    проверка ротации и запись в файл выполняются один раз на сброс,
+    а не на каждую запись. Для остальных target поведение стандартное.
+    """
+    
+    def flush(self) -> None:
+        handle_batch = getattr(self.target, 'handle_batch', None)
+        if handle_batch is None:
+            super().flush()
+            return
+        
+        with self.lock:
+            if self.buffer:
+                handle_batch(self.buffer)
+                self.buffer = []
+
+
+def get_buffered_handler(
+    target: logging.Handler,
+    capacity: int = 512
+) -> logging.handlers.MemoryHandler:
+    """
+    Обернуть handler в MemoryHandler для пакетной записи.
+    
+    Записи копятся в памяти и пишутся одной пачкой при заполнении буфера,
+    при записи уровня ERROR и выше, а также раз в BUFFER_FLUSH_INTERVAL
+    секунд, чтобы редкие логи не задерживались.
+    
+    Args:
+        target: Handler, выполняющий фактическую запись
+        capacity: Размер буфера в записях
+    
+    Returns:
+        BatchingMemoryHandler
+    """
+    global _flusher_thread
+    
+    buffered = BatchingMemoryHandler(
+        capacity=capacity,
+        flushLevel=logging.ERROR,
+        target=target,
+        flushOnClose=True
+    )
+    # Уровень проверяется до буферизации, фильтры и форматтер остаются на target
+    buffered.setLevel(target.level)
+    _buffered_handlers.add(buffered)
+    
+    with _flusher_lock:
+        if _flusher_thread is None:
+            _flusher_thread = threading.Thread(
+                target=_flush_buffered_handlers,
+                name="log-buffer-flusher",
+                daemon=True
+            )
+            _flusher_thread.start()
+    
+    return buffered
+
+
+class FastRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    RotatingFileHandler без seek/tell на каждую запись.
+    
+    Размер файла отслеживается счетчиком записанных байт, который
+    инициализируется размером файла при открытии. Запись форматируется
+    один раз, а не дважды (для проверки ротации и для вывода).
+    """
+    
+    def __init__(self, *args, **kwargs):
+        self._bytes = 0
+        super().__init__(*args, **kwargs)
+    
+    def _open(self):
+        stream = super()._open()
+        try:
+            self._bytes = os.path.getsize(self.baseFilename)
+        except OSError:
+            self._bytes = 0
+        return stream
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            msg = self.format(record) + self.terminator
+            if msg.isascii():
+                size = len(msg)
+            else:
+                size = len(msg.encode(self.encoding or 'utf-8', errors='replace'))
+            
+            if self.maxBytes > 0 and self._bytes + size >= self.maxBytes and self._bytes > 0:
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            
+            self.stream.write(msg)
+            self.flush()
+            self._bytes += size
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+    
+    def handle_batch(self, records: List[logging.LogRecord]) -> None:
+        """
+        Записать пачку записей одной операцией записи.
+        
+        Размер для ротации проверяется один раз на всю пачку,
+        поэтому файл может превысить maxBytes на размер одной пачки.
+        
+        Args:
+            records: Записи из буфера MemoryHandler
+        """
+        messages = []
+        for record in records:
+            if not self.filter(record):
+                continue
+            try:
+                messages.append(self.format(record) + self.terminator)
+            except RecursionError:
+                raise
+            except Exception:
+                self.handleError(record)
+        if not messages:
+            return
+        
+        data = ''.join(messages)
+        if data.isascii():
+            size = len(data)
+        else:
+            size = len(data.encode(self.encoding or 'utf-8', errors='replace'))
+        
+        with self.lock:
+            try:
+                if self.maxBytes > 0 and self._bytes + size >= self.maxBytes and self._bytes > 0:
+                    self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+                
+                self.stream.write(data)
+                self.stream.flush()
+                self._bytes += size
+            except RecursionError:
+                raise
+            except Exception:
+                self.handleError(records[-1])
+
+
 def get_file_handler(
     filename: str,
     level: str = 'DEBUG',
@@ -76,8 +544,9 @@ def get_file_handler(
     backup_count: int = 10,
     encoding: str = 'utf-8',
     formatter: Optional[logging.Formatter] = None,
-    use_json: bool = False
-) -> logging.handlers.RotatingFileHandler:
+    use_json: bool = False,
+    buffered: bool = True
+) -> logging.Handler:
     """
     Создать file handler с ротацией.
     
@@ -89,16 +558,17 @@ def get_file_handler(
         encoding: Кодировка файла
         formatter: Форматтер для логов
         use_json: Использовать JSON формат
+        buffered: Накапливать записи в MemoryHandler перед записью в файл
     
     Returns:
-        RotatingFileHandler
+        FastRotatingFileHandler или MemoryHandler поверх него
     """
     # Создаем директорию если её нет
     log_path = Path(filename)
     log_path.parent.mkdir(parents=True, exist_ok=True)
     
     # Создаем handler
-    handler = logging.handlers.RotatingFileHandler(
+    handler = FastRotatingFileHandler(
         filename=filename,
         maxBytes=max_bytes,
         backupCount=backup_count,
@@ -106,33 +576,13 @@ def get_file_handler(
     )
     
     # Устанавливаем уровень
-    handler.setLevel(getattr(logging, level.upper()))
-    
-    # Устанавливаем форматтер
-    if formatter:
-        handler.setFormatter(formatter)
-    elif use_json:
-        try:
-            from pythonjsonlogger import jsonlogger
-            json_formatter = jsonlogger.JsonFormatter(
-                '%(asctime)s %(name)s %(levelname)s %(message)s %(pathname)s %(lineno)d'
-            )
-            handler.setFormatter(json_formatter)
-        except ImportError:
-            # Fallback to standard formatter
-            standard_formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(standard_formatter)
-    else:
-        standard_formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
-        )
-        handler.setFormatter(standard_formatter)
+    handler.setLevel(resolve_log_level(level))
     
-    # Добавляем фильтр для чувствительных данных
-    handler.addFilter(SensitiveDataFilter())
+    # Устанавливаем форматтер с маскированием чувствительных данных
+    handler.setFormatter(_select_formatter(formatter, use_json, _JSON_FORMATTER, _DETAILED_FORMATTER))
     
+    if buffered:
+        return get_buffered_handler(handler)
     return handler
 
 
@@ -156,32 +606,10 @@ def get_stream_handler(
     handler = logging.StreamHandler()
     
     # Устанавливаем уровень
-    handler.setLevel(getattr(logging, level.upper()))
-    
-    # Устанавливаем форматтер
-    if formatter:
-        handler.setFormatter(formatter)
-    elif use_json:
-        try:
-            from pythonjsonlogger import jsonlogger
-            json_formatter = jsonlogger.JsonFormatter(
-                '%(asctime)s %(name)s %(levelname)s %(message)s'
-            )
-            handler.setFormatter(json_formatter)
-        except ImportError:
-            # Fallback to standard formatter
-            standard_formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(standard_formatter)
-    else:
-        standard_formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        handler.setFormatter(standard_formatter)
+    handler.setLevel(resolve_log_level(level))
     
-    # Добавляем фильтр для чувствительных данных
-    handler.addFilter(SensitiveDataFilter())
+    # Устанавливаем форматтер с маскированием чувствительных данных
+    handler.setFormatter(_select_formatter(formatter, use_json, _JSON_SHORT_FORMATTER, _STANDARD_FORMATTER))
     
     return handler
 
@@ -208,34 +636,60 @@ def get_syslog_handler(
     handler = logging.handlers.SysLogHandler(address=address)
     
     # Устанавливаем уровень
-    handler.setLevel(getattr(logging, level.upper()))
+    handler.setLevel(resolve_log_level(level))
     
-    # Устанавливаем форматтер
-    if formatter:
-        handler.setFormatter(formatter)
-    elif use_json:
-        try:
-            from pythonjsonlogger import jsonlogger
-            json_formatter = jsonlogger.JsonFormatter(
-                '%(asctime)s %(name)s %(levelname)s %(message)s %(pathname)s %(lineno)d'
-            )
-            handler.setFormatter(json_formatter)
-        except ImportError:
-            # Fallback to standard formatter
-            standard_formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(standard_formatter)
-    else:
-        standard_formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    # Устанавливаем форматтер с маскированием чувствительных данных
+    handler.setFormatter(_select_formatter(formatter, use_json, _JSON_FORMATTER, _STANDARD_FORMATTER))
+    
+    return handler
+
+
+_compression_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_compression_executor() -> ThreadPoolExecutor:
+    global _compression_executor
+    if _compression_executor is None:
+        _compression_executor = ThreadPoolExecutor(
+            max_workers=os.cpu_count() or 1,
+            thread_name_prefix="log-compress"
         )
-        handler.setFormatter(standard_formatter)
+    return _compression_executor
+
+
+def _compress_log_file(log_file: Path) -> None:
+    """
+    Сжатие ротированного лога с удалением оригинала.
     
-    # Добавляем фильтр для чувствительных данных
-    handler.addFilter(SensitiveDataFilter())
+    Использует pigz (параллельный gzip), если он установлен,
+    иначе gzip с быстрым уровнем сжатия.
     
-    return handler
+    Args:
+        log_file: Путь к ротированному файлу лога
+    """
+    pigz = shutil.which('pigz')
+    if pigz:
+        # pigz сам заменяет файл на file.gz
+        subprocess.run([pigz, '-q', str(log_file)], check=True)
+        return
+    
+    # Пишем во временный файл и атомарно переименовываем, чтобы
+    # не оставить обрезанный .gz при сбое посреди сжатия
+    target = f'{log_file}.gz'
+    tmp_target = f'{target}.tmp'
+    with open(log_file, 'rb', buffering=1 << 20) as f_in:
+        with gzip.open(tmp_target, 'wb', compresslevel=1) as f_out:
+            shutil.copyfileobj(f_in, f_out, length=1 << 20)
+    os.replace(tmp_target, target)
+    
+    # Удаляем оригинальный файл
+    log_file.unlink()
+
+
+def _report_compression_error(future: Future) -> None:
+    error = future.exception()
+    if error is not None:
+        logging.getLogger(__name__).error("Ошибка сжатия ротированного лога: %s", error)
 
 
 class TimedRotatingFileHandlerWithCompression(logging.handlers.TimedRotatingFileHandler):
@@ -277,29 +731,68 @@ class TimedRotatingFileHandlerWithCompression(logging.handlers.TimedRotatingFile
             utc=utc,
             atTime=at_time
         )
-    
-    def doRollover(self) -> None:
-        """Выполнить ротацию с сжатием."""
-        super().doRollover()
         
-        # Сжимаем старые логи
-        import gzip
-        import shutil
-        from pathlib import Path
+        # Ротация через хуки: namer дает итоговое имя .gz, rotator
+        # переименовывает файл и передает его на сжатие в фоне
+        self.namer = _gzip_namer
+        self.rotator = _gzip_rotator
+        
+        # Досжимаем файлы, оставшиеся несжатыми после аварийной остановки
+        base = Path(self.baseFilename)
+        for log_file in sorted(base.parent.glob(f'{base.name}.*')):
+            if log_file.suffix not in ('.gz', '.tmp'):
+                _submit_compression(log_file)
+    
+    def getFilesToDelete(self) -> List[str]:
+        """
+        Найти старые резервные копии для удаления.
         
-        log_dir = Path(self.baseFilename).parent
-        log_name = Path(self.baseFilename).stem
+        Учитываются только готовые .gz: несжатый файл и .gz.tmp того же
+        периода не являются отдельными копиями, и их еще использует поток
+        сжатия.
         
-        # Находим все несжатые ротированные логи
-        for log_file in log_dir.glob(f'{log_name}.*'):
-            if not log_file.suffix == '.gz' and log_file != Path(self.baseFilename):
-                # Сжимаем файл
-                with open(log_file, 'rb') as f_in:
-                    with gzip.open(f'{log_file}.gz', 'wb') as f_out:
-                        shutil.copyfileobj(f_in, f_out)
-                
-                # Удаляем оригинальный файл
-                log_file.unlink()
+        Returns:
+            Пути файлов сверх backupCount, от старых к новым
+        """
+        dir_name, base_name = os.path.split(self.baseFilename)
+        prefix = base_name + '.'
+        result = []
+        for file_name in os.listdir(dir_name):
+            if not (file_name.startswith(prefix) and file_name.endswith('.gz')):
+                continue
+            if self.extMatch.fullmatch(file_name[len(prefix):-len('.gz')]):
+                result.append(os.path.join(dir_name, file_name))
+        if len(result) <= self.backupCount:
+            return []
+        result.sort()
+        return result[:len(result) - self.backupCount]
+
+
+def _gzip_namer(name: str) -> str:
+    return name + '.gz'
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    """
+    Rotator для TimedRotatingFileHandlerWithCompression.
+    
+    Переименование выполняется сразу, а потоковое сжатие в dest
+    уходит в пул потоков, чтобы не задерживать запись логов.
+    
+    Args:
+        source: Текущий файл лога
+        dest: Итоговое имя сжатого файла (с суффиксом .gz)
+    """
+    if not os.path.exists(source):
+        return
+    rotated = dest[:-len('.gz')] if dest.endswith('.gz') else dest
+    os.replace(source, rotated)
+    _submit_compression(Path(rotated))
+
+
+def _submit_compression(log_file: Path) -> None:
+    future = _get_compression_executor().submit(_compress_log_file, log_file)
+    future.add_done_callback(_report_compression_error)
 
 
 def get_timed_rotating_handler(
@@ -311,7 +804,8 @@ def get_timed_rotating_handler(
     encoding: str = 'utf-8',
     formatter: Optional[logging.Formatter] = None,
     use_json: bool = False,
-    compress: bool = True
+    compress: bool = True,
+    buffered: bool = True
 ) -> logging.Handler:
     """
     Создать timed rotating file handler.
@@ -326,9 +820,10 @@ def get_timed_rotating_handler(
         formatter: Форматтер для логов
         use_json: Использовать JSON формат
         compress: Сжимать старые логи
+        buffered: Накапливать записи в MemoryHandler перед записью в файл
     
     Returns:
-        TimedRotatingFileHandler
+        TimedRotatingFileHandler или MemoryHandler поверх него
     """
     # Создаем директорию если её нет
     log_path = Path(filename)
@@ -353,31 +848,85 @@ def get_timed_rotating_handler(
         )
     
     # Устанавливаем уровень
-    handler.setLevel(getattr(logging, level.upper()))
+    handler.setLevel(resolve_log_level(level))
     
-    # Устанавливаем форматтер
-    if formatter:
-        handler.setFormatter(formatter)
-    elif use_json:
-        try:
-            from pythonjsonlogger import jsonlogger
-            json_formatter = jsonlogger.JsonFormatter(
-                '%(asctime)s %(name)s %(levelname)s %(message)s %(pathname)s %(lineno)d'
-            )
-            handler.setFormatter(json_formatter)
-        except ImportError:
-            # Fallback to standard formatter
-            standard_formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(standard_formatter)
-    else:
-        standard_formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
-        )
-        handler.setFormatter(standard_formatter)
+    # Устанавливаем форматтер с маскированием чувствительных данных
+    handler.setFormatter(_select_formatter(formatter, use_json, _JSON_FORMATTER, _DETAILED_FORMATTER))
+    
+    if buffered:
+        return get_buffered_handler(handler)
+    return handler
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler, оставляющий форматирование потоку listener.
+    
+    Стандартный prepare() форматирует запись в вызывающем потоке и
+    вклеивает traceback в msg, обнуляя exc_info: JSON форматтер тогда не
+    получает поле exc_info. Здесь в вызывающем потоке только подставляются
+    args (объекты в них могут измениться до записи), а exc_info, exc_text
+    и stack_info передаются listener как есть.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+# Запущенные listener асинхронных handlers
+_listeners: List[logging.handlers.QueueListener] = []
+_listeners_lock = threading.Lock()
+
+
+def stop_async_handlers() -> None:
+    """
+    Остановить listener всех асинхронных handlers.
     
-    # Добавляем фильтр для чувствительных данных
-    handler.addFilter(SensitiveDataFilter())
+    Очереди дописываются до конца. Каждый listener останавливается один
+    раз: повторный QueueListener.stop() на Python 3.11 падает с
+    AttributeError. Безопасно вызывать повторно.
+    """
+    with _listeners_lock:
+        listeners = list(_listeners)
+        _listeners.clear()
+    for listener in listeners:
+        if getattr(listener, '_thread', None) is not None:
+            listener.stop()
+
+
+# Регистрируется после logging.shutdown, поэтому выполняется раньше него
+# (atexit вызывает в обратном порядке): очереди успевают опустеть до
+# закрытия файлов
+atexit.register(stop_async_handlers)
+
+
+def get_async_handler(real_handler: logging.Handler) -> logging.handlers.QueueHandler:
+    """
+    Обернуть handler в DeferredQueueHandler с фоновым QueueListener.
+    
+    Вызывающий поток только кладет запись в очередь; форматирование,
+    фильтры, ротация и запись в файл выполняются в потоке listener.
+    Уровень и фильтры оборачиваемого handler продолжают действовать.
+    Listener останавливается stop_async_handlers() или при выходе.
+    
+    Args:
+        real_handler: Handler, выполняющий фактический вывод
+    
+    Returns:
+        QueueHandler для подключения к логгерам
+    """
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(
+        log_queue, real_handler, respect_handler_level=True
+    )
+    listener.start()
+    with _listeners_lock:
+        _listeners.append(listener)
     
-    return handler
\ No newline at end of file
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.listener = listener
+    return queue_handler
@@ -6,14 +6,23 @@
 - Разные уровни логирования для разных модулей
 - Ротацию логов
 - Форматирование для ELK Stack
+
+В вызовах логгеров используйте %-аргументы вместо f-строк:
+logger.debug("user=%s", user_id) форматирует сообщение только если
+запись действительно будет выведена.
 """
 
 from typing import Optional, Dict, Any
+import copy
+import functools
 import logging
 import logging.config
+import logging.handlers
 from pathlib import Path
 import sys
 
+from .log_handlers import get_async_handler, resolve_log_level, stop_async_handlers
+
 
 # Конфигурация логирования по умолчанию
 DEFAULT_LOG_CONFIG: Dict[str, Any] = {
@@ -21,7 +30,7 @@ DEFAULT_LOG_CONFIG: Dict[str, Any] = {
     'disable_existing_loggers': False,
     'formatters': {
         'json': {
-            '()': 'pythonjsonlogger.jsonlogger.JsonFormatter',
+            '()': 'monitoring.logging.log_handlers.get_json_formatter',
             'format': '%(asctime)s %(name)s %(levelname)s %(message)s %(pathname)s %(lineno)d',
             'datefmt': '%Y-%m-%d %H:%M:%S'
         },
@@ -36,7 +45,7 @@ DEFAULT_LOG_CONFIG: Dict[str, Any] = {
     },
     'filters': {
         'sensitive_data': {
-            '()': 'monitoring.logging.log_handlers.SensitiveDataFilter'
+            '()': 'monitoring.logging.log_handlers.get_sensitive_filter'
         }
     },
     'handlers': {
@@ -130,7 +139,8 @@ def setup_logging(
     use_json: bool = True,
     use_syslog: bool = False,
     syslog_address: Optional[tuple] = None,
-    config: Optional[Dict[str, Any]] = None
+    config: Optional[Dict[str, Any]] = None,
+    async_handlers: bool = True
 ) -> None:
     """
     Настройка логирования для приложения.
@@ -142,13 +152,15 @@ def setup_logging(
         use_syslog: Использовать syslog
         syslog_address: Адрес syslog сервера (host, port)
         config: Пользовательская конфигурация логирования
+        async_handlers: Выполнять вывод логов в фоновых потоках через QueueHandler
     """
     # Создаем директорию для логов если её нет
     log_path = Path(log_dir)
     log_path.mkdir(parents=True, exist_ok=True)
     
-    # Используем пользовательскую конфигурацию или конфигурацию по умолчанию
-    log_config = config or DEFAULT_LOG_CONFIG.copy()
+    # Используем пользовательскую конфигурацию или конфигурацию по умолчанию.
+    # Глубокая копия: ниже изменяются вложенные словари и списки handlers
+    log_config = copy.deepcopy(config or DEFAULT_LOG_CONFIG)
     
     # Обновляем пути к файлам логов
     if 'handlers' in log_config:
@@ -185,21 +197,57 @@ def setup_logging(
             if 'handlers' in logger_config:
                 logger_config['handlers'].append('syslog')
     
+    # Listener предыдущей настройки дописывают очереди, пока их handlers
+    # еще открыты: dictConfig закрывает существующие handlers
+    stop_async_handlers()
+    
     # Применяем конфигурацию
     logging.config.dictConfig(log_config)
     
+    if async_handlers:
+        _wrap_handlers_async(log_config.get('loggers', {}))
+    
     # Логируем успешную инициализацию
     logger = logging.getLogger(__name__)
     logger.info(
-        f'Logging configured: level={log_level}, '
-        f'log_dir={log_dir}, use_json={use_json}, use_syslog={use_syslog}'
+        'Logging configured: level=%s, log_dir=%s, use_json=%s, use_syslog=%s',
+        log_level, log_dir, use_json, use_syslog
     )
 
 
+def _wrap_handlers_async(loggers_config: Dict[str, Any]) -> None:
+    """
+    Заменить handlers настроенных логгеров на QueueHandler.
+    
+    Каждый handler получает один QueueHandler и один поток listener,
+    даже если он подключен к нескольким логгерам.
+    
+    Args:
+        loggers_config: Секция 'loggers' конфигурации логирования
+    """
+    wrappers: Dict[int, logging.Handler] = {}
+    for logger_name in loggers_config:
+        logger = logging.getLogger(logger_name or None)
+        for handler in list(logger.handlers):
+            if isinstance(handler, logging.handlers.QueueHandler):
+                continue
+            wrapper = wrappers.get(id(handler))
+            if wrapper is None:
+                wrapper = get_async_handler(handler)
+                wrappers[id(handler)] = wrapper
+            logger.removeHandler(handler)
+            logger.addHandler(wrapper)
+
+
+@functools.lru_cache(maxsize=None)
 def get_logger(name: str) -> logging.Logger:
     """
     Получить логгер по имени.
     
+    Логгеры в logging не удаляются и не пересоздаются (в том числе при
+    dictConfig), поэтому повторные вызовы обслуживаются из кэша без
+    обращения к logging.Manager под глобальной блокировкой.
+    
     Args:
         name: Имя логгера
     
@@ -218,8 +266,8 @@ def set_log_level(logger_name: str, level: str) -> None:
         level: Уровень логирования
     """
     logger = logging.getLogger(logger_name)
-    logger.setLevel(getattr(logging, level.upper()))
-    logger.info(f'Log level for {logger_name} set to {level}')
+    logger.setLevel(resolve_log_level(level))
+    logger.info('Log level for %s set to %s', logger_name, level)
 
 
 def add_handler(
@@ -259,4 +307,4 @@ def get_log_config() -> Dict[str, Any]:
     Returns:
         Конфигурация логирования
     """
-    return DEFAULT_LOG_CONFIG.copy()
\ No newline at end of file
+    return copy.deepcopy(DEFAULT_LOG_CONFIG)
\ No newline at end of file
@@ -9,44 +9,118 @@
 - Панели управления
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, List, Tuple, Union
 from prometheus_client import Counter, Gauge, Histogram
-from .prometheus_metrics import PrometheusMetrics
-from functools import wraps
-import time
+import threading
+from functools import partial
+from .prometheus_metrics import (
+    PrometheusMetrics, cached_labels, counter_aggregator, normalize_endpoint, status_label,
+    wrap_timed
+)
 
 
-class CustomMetrics:
-    """Класс для управления кастомными метриками."""
+# Имена исключений, которые попадают в метку error_code как есть;
+# остальные записываются как "other", чтобы число рядов было ограничено
+_KNOWN_ERRORS = frozenset({
+    "TimeoutError",
+    "ConnectionError",
+    "HTTPError",
+    "ValidationError",
+    "PaymentDeclined",
+})
+
+# Последнее записанное значение доступности по платежным системам
+_availability_cache: Dict[str, bool] = {}
+
+
+class _AnalyticsGauges:
+    """
+    Gauge бизнес-аналитики.
     
-    # Бизнес-метрики
-    conversion_rate = Gauge(
-        'conversion_rate',
-        'Коэффициент конверсии (регистрация -> подписка)',
-        ['period'],
-        registry=PrometheusMetrics.registry
-    )
+    Обновляются только аналитическими задачами, поэтому регистрируются
+    в реестре при первой записи, а не при импорте модуля.
+    """
     
-    average_ltv = Gauge(
+    __slots__ = (
+        'conversion_rate',
         'average_ltv',
-        'Средний LTV пользователя',
-        ['currency'],
-        registry=PrometheusMetrics.registry
-    )
-    
-    churn_rate = Gauge(
         'churn_rate',
-        'Процент оттока пользователей',
-        ['period'],
-        registry=PrometheusMetrics.registry
+        'average_subscription_duration',
+        'promo_code_redemption_rate',
+        'referral_conversion_rate',
+        'trial_conversion_rate',
     )
     
-    average_subscription_duration = Gauge(
-        'average_subscription_duration_days',
-        'Средняя длительность подписки в днях',
-        ['plan_type'],
-        registry=PrometheusMetrics.registry
-    )
+    def __init__(self, registry):
+        self.conversion_rate = Gauge(
+            'conversion_rate',
+            'Коэффициент конверсии (регистрация -> подписка)',
+            ['period'],
+            registry=registry
+        )
+        
+        self.average_ltv = Gauge(
+            'average_ltv',
+            'Средний LTV пользователя',
+            ['currency'],
+            registry=registry
+        )
+        
+        self.churn_rate = Gauge(
+            'churn_rate',
+            'Процент оттока пользователей',
+            ['period'],
+            registry=registry
+        )
+        
+        self.average_subscription_duration = Gauge(
+            'average_subscription_duration_days',
+            'Средняя длительность подписки в днях',
+            ['plan_type'],
+            registry=registry
+        )
+        
+        self.promo_code_redemption_rate = Gauge(
+            'promo_code_redemption_rate',
+            'Процент использования промокодов',
+            ['promo_type'],
+            registry=registry
+        )
+        
+        self.referral_conversion_rate = Gauge(
+            'referral_conversion_rate',
+            'Коэффициент конверсии реферальной программы',
+            registry=registry
+        )
+        
+        self.trial_conversion_rate = Gauge(
+            'trial_conversion_rate',
+            'Процент конверсии из триала в платную подписку',
+            registry=registry
+        )
+
+
+_analytics_gauges: Optional[_AnalyticsGauges] = None
+_analytics_lock = threading.Lock()
+
+
+def analytics_gauges() -> _AnalyticsGauges:
+    """
+    Gauge бизнес-аналитики, созданные при первом обращении.
+    
+    Returns:
+        _AnalyticsGauges
+    """
+    global _analytics_gauges
+    if _analytics_gauges is None:
+        with _analytics_lock:
+            if _analytics_gauges is None:
+                _analytics_gauges = _AnalyticsGauges(PrometheusMetrics.registry)
+    return _analytics_gauges
+
+
+class CustomMetrics:
+    """Класс для управления кастомными метриками."""
     
     # Метрики платежных систем
     payment_system_availability = Gauge(
@@ -60,6 +134,7 @@ class CustomMetrics:
         'payment_system_response_time_seconds',
         'Время ответа платежной системы',
         ['payment_system', 'operation'],
+        buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30),
         registry=PrometheusMetrics.registry
     )
     
@@ -82,6 +157,7 @@ class CustomMetrics:
         'panel_api_response_time_seconds',
         'Время ответа API панели управления',
         ['endpoint'],
+        buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
         registry=PrometheusMetrics.registry
     )
     
@@ -99,13 +175,6 @@ class CustomMetrics:
     )
     
     # Метрики промокодов
-    promo_code_redemption_rate = Gauge(
-        'promo_code_redemption_rate',
-        'Процент использования промокодов',
-        ['promo_type'],
-        registry=PrometheusMetrics.registry
-    )
-    
     promo_code_revenue = Counter(
         'promo_code_revenue_total',
         'Выручка от промокодов',
@@ -114,12 +183,6 @@ class CustomMetrics:
     )
     
     # Метрики реферальной программы
-    referral_conversion_rate = Gauge(
-        'referral_conversion_rate',
-        'Коэффициент конверсии реферальной программы',
-        registry=PrometheusMetrics.registry
-    )
-    
     referral_revenue = Counter(
         'referral_revenue_total',
         'Выручка от реферальной программы',
@@ -134,12 +197,6 @@ class CustomMetrics:
     )
     
     # Метрики триала
-    trial_conversion_rate = Gauge(
-        'trial_conversion_rate',
-        'Процент конверсии из триала в платную подписку',
-        registry=PrometheusMetrics.registry
-    )
-    
     active_trials = Gauge(
         'active_trials',
         'Количество активных триалов',
@@ -159,7 +216,7 @@ class CustomMetrics:
             period: Период (daily, weekly, monthly)
             rate: Коэффициент конверсии (0-100)
         """
-        cls.conversion_rate.labels(period=period).set(rate)
+        analytics_gauges().conversion_rate.labels(period=period).set(rate)
     
     @classmethod
     def set_average_ltv(
@@ -174,7 +231,7 @@ class CustomMetrics:
             currency: Валюта
             ltv: Средний LTV
         """
-        cls.average_ltv.labels(currency=currency).set(ltv)
+        analytics_gauges().average_ltv.labels(currency=currency).set(ltv)
     
     @classmethod
     def set_churn_rate(
@@ -189,7 +246,7 @@ class CustomMetrics:
             period: Период (daily, weekly, monthly)
             rate: Процент оттока (0-100)
         """
-        cls.churn_rate.labels(period=period).set(rate)
+        analytics_gauges().churn_rate.labels(period=period).set(rate)
     
     @classmethod
     def set_average_subscription_duration(
@@ -204,7 +261,7 @@ class CustomMetrics:
             plan_type: Тип плана
             days: Длительность в днях
         """
-        cls.average_subscription_duration.labels(plan_type=plan_type).set(days)
+        analytics_gauges().average_subscription_duration.labels(plan_type=plan_type).set(days)
     
     @classmethod
     def set_payment_system_availability(
@@ -219,6 +276,10 @@ class CustomMetrics:
             payment_system: Название платежной системы
             is_available: Доступна ли система
         """
+        # Gauge обновляется только при смене состояния
+        if _availability_cache.get(payment_system) is is_available:
+            return
+        _availability_cache[payment_system] = is_available
         cls.payment_system_availability.labels(
             payment_system=payment_system
         ).set(1 if is_available else 0)
@@ -238,10 +299,7 @@ class CustomMetrics:
             operation: Тип операции
             duration: Длительность в секундах
         """
-        cls.payment_system_response_time.labels(
-            payment_system=payment_system,
-            operation=operation
-        ).observe(duration)
+        _payment_system_response_time_child(payment_system, operation).observe(duration)
     
     @classmethod
     def increment_payment_system_errors(
@@ -256,10 +314,7 @@ class CustomMetrics:
             payment_system: Название платежной системы
             error_code: Код ошибки
         """
-        cls.payment_system_errors.labels(
-            payment_system=payment_system,
-            error_code=error_code
-        ).inc()
+        counter_aggregator.inc(_payment_system_errors_child(payment_system, error_code))
     
     @classmethod
     def increment_panel_api_requests(
@@ -276,11 +331,9 @@ class CustomMetrics:
             method: HTTP метод
             status: HTTP статус
         """
-        cls.panel_api_requests.labels(
-            endpoint=endpoint,
-            method=method,
-            status=str(status)
-        ).inc()
+        counter_aggregator.inc(_panel_api_requests_child(
+            normalize_endpoint(endpoint), method, status_label(status)
+        ))
     
     @classmethod
     def observe_panel_api_response_time(
@@ -295,9 +348,7 @@ class CustomMetrics:
             endpoint: Endpoint API
             duration: Длительность в секундах
         """
-        cls.panel_api_response_time.labels(
-            endpoint=endpoint
-        ).observe(duration)
+        _panel_api_response_time_child(normalize_endpoint(endpoint)).observe(duration)
     
     @classmethod
     def increment_panel_sync_operations(
@@ -312,20 +363,14 @@ class CustomMetrics:
             operation_type: Тип операции
             status: Статус (success, failed)
         """
-        cls.panel_sync_operations.labels(
+        counter_aggregator.inc(cls.panel_sync_operations.labels(
             operation_type=operation_type,
             status=status
-        ).inc()
+        ))
     
-    @classmethod
-    def set_panel_sync_lag(cls, lag_seconds: float) -> None:
-        """
-        Установить задержку синхронизации.
-        
-        Args:
-            lag_seconds: Задержка в секундах
-        """
-        cls.panel_sync_lag.set(lag_seconds)
+    # Сеттеры gauge без меток — bound-методы Gauge.set, без промежуточного вызова
+    # Установить задержку синхронизации
+    set_panel_sync_lag = panel_sync_lag.set
     
     @classmethod
     def set_promo_code_redemption_rate(
@@ -340,7 +385,7 @@ class CustomMetrics:
             promo_type: Тип промокода
             rate: Процент использования (0-100)
         """
-        cls.promo_code_redemption_rate.labels(
+        analytics_gauges().promo_code_redemption_rate.labels(
             promo_type=promo_type
         ).set(rate)
     
@@ -359,10 +404,10 @@ class CustomMetrics:
             currency: Валюта
             amount: Сумма
         """
-        cls.promo_code_revenue.labels(
+        counter_aggregator.inc(cls.promo_code_revenue.labels(
             promo_type=promo_type,
             currency=currency
-        ).inc(amount)
+        ), amount)
     
     @classmethod
     def set_referral_conversion_rate(cls, rate: float) -> None:
@@ -372,7 +417,7 @@ class CustomMetrics:
         Args:
             rate: Коэффициент конверсии (0-100)
         """
-        cls.referral_conversion_rate.set(rate)
+        analytics_gauges().referral_conversion_rate.set(rate)
     
     @classmethod
     def increment_referral_revenue(
@@ -387,17 +432,10 @@ class CustomMetrics:
             currency: Валюта
             amount: Сумма
         """
-        cls.referral_revenue.labels(currency=currency).inc(amount)
+        counter_aggregator.inc(cls.referral_revenue.labels(currency=currency), amount)
     
-    @classmethod
-    def set_active_referrers(cls, count: int) -> None:
-        """
-        Установить количество активных рефереров.
-        
-        Args:
-            count: Количество рефереров
-        """
-        cls.active_referrers.set(count)
+    # Установить количество активных рефереров
+    set_active_referrers = active_referrers.set
     
     @classmethod
     def set_trial_conversion_rate(cls, rate: float) -> None:
@@ -407,17 +445,55 @@ class CustomMetrics:
         Args:
             rate: Процент конверсии (0-100)
         """
-        cls.trial_conversion_rate.set(rate)
+        analytics_gauges().trial_conversion_rate.set(rate)
+    
+    # Установить количество активных триалов
+    set_active_trials = active_trials.set
     
     @classmethod
-    def set_active_trials(cls, count: int) -> None:
+    def bulk_set(
+        cls,
+        updates: Iterable[Tuple[Union[str, Gauge], Optional[Dict[str, str]], float]]
+    ) -> None:
+        """
+        Установить значения нескольких gauge одной пачкой.
+        
+        Сначала разрешаются все дочерние метрики, затем выполняются
+        записи подряд. Gauge можно передать объектом или именем атрибута
+        (gauge бизнес-аналитики, CustomMetrics или PrometheusMetrics).
+        
+        Args:
+            updates: Тройки (gauge, метки или None, значение)
+        
+        Example:
+            CustomMetrics.bulk_set([
+                ('conversion_rate', {'period': 'daily'}, 3.5),
+                ('churn_rate', {'period': 'daily'}, 1.2),
+                ('trial_conversion_rate', None, 18.0),
+            ])
+        """
+        resolved = []
+        for metric, labels, value in updates:
+            if isinstance(metric, str):
+                metric = _resolve_gauge(metric)
+            resolved.append((metric.labels(**labels) if labels else metric, value))
+        
+        for child, value in resolved:
+            child.set(value)
+    
+    @staticmethod
+    def register_panel_endpoints(routes: List[Tuple[str, str]]) -> None:
         """
-        Установить количество активных триалов.
+        Заранее создать метрики для известных endpoint панели.
+        
+        Дочерние метрики создаются при старте, а не при первом запросе,
+        и ряды с нулевыми значениями видны в Prometheus сразу.
         
         Args:
-            count: Количество триалов
+            routes: Пары (endpoint, HTTP метод)
         """
-        cls.active_trials.set(count)
+        for endpoint, method in routes:
+            _panel_endpoint_children(endpoint, method)
     
     @staticmethod
     def track_payment_system(payment_system: str, operation: str):
@@ -429,62 +505,23 @@ class CustomMetrics:
             operation: Тип операции
         """
         def decorator(func):
-            @wraps(func)
-            async def async_wrapper(*args, **kwargs):
-                start_time = time.time()
-                try:
-                    result = await func(*args, **kwargs)
-                    CustomMetrics.set_payment_system_availability(
-                        payment_system, True
-                    )
-                    return result
-                except Exception as e:
-                    CustomMetrics.set_payment_system_availability(
-                        payment_system, False
-                    )
-                    CustomMetrics.increment_payment_system_errors(
-                        payment_system,
-                        type(e).__name__
-                    )
-                    raise
-                finally:
-                    duration = time.time() - start_time
-                    CustomMetrics.observe_payment_system_response_time(
-                        payment_system,
-                        operation,
-                        duration
-                    )
+            def on_success():
+                CustomMetrics.set_payment_system_availability(payment_system, True)
             
-            @wraps(func)
-            def sync_wrapper(*args, **kwargs):
-                start_time = time.time()
-                try:
-                    result = func(*args, **kwargs)
-                    CustomMetrics.set_payment_system_availability(
-                        payment_system, True
-                    )
-                    return result
-                except Exception as e:
-                    CustomMetrics.set_payment_system_availability(
-                        payment_system, False
-                    )
-                    CustomMetrics.increment_payment_system_errors(
-                        payment_system,
-                        type(e).__name__
-                    )
-                    raise
-                finally:
-                    duration = time.time() - start_time
-                    CustomMetrics.observe_payment_system_response_time(
-                        payment_system,
-                        operation,
-                        duration
-                    )
+            def on_error(error: Exception):
+                CustomMetrics.set_payment_system_availability(payment_system, False)
+                error_name = type(error).__name__
+                CustomMetrics.increment_payment_system_errors(
+                    payment_system,
+                    error_name if error_name in _KNOWN_ERRORS else "other"
+                )
             
-            # Определяем, является ли функция асинхронной
-            if hasattr(func, '__code__') and func.__code__.co_flags & 0x80:
-                return async_wrapper
-            return sync_wrapper
+            return wrap_timed(
+                func,
+                _payment_system_response_time_child(payment_system, operation).observe,
+                on_success=on_success,
+                on_error=on_error
+            )
         
         return decorator
     
@@ -498,53 +535,51 @@ class CustomMetrics:
             method: HTTP метод
         """
         def decorator(func):
-            @wraps(func)
-            async def async_wrapper(*args, **kwargs):
-                start_time = time.time()
-                status = 200
-                try:
-                    result = await func(*args, **kwargs)
-                    return result
-                except Exception as e:
-                    status = 500
-                    raise
-                finally:
-                    duration = time.time() - start_time
-                    CustomMetrics.increment_panel_api_requests(
-                        endpoint,
-                        method,
-                        status
-                    )
-                    CustomMetrics.observe_panel_api_response_time(
-                        endpoint,
-                        duration
-                    )
+            observe_response_time, ok_counter, error_counter = _panel_endpoint_children(
+                endpoint, method
+            )
             
-            @wraps(func)
-            def sync_wrapper(*args, **kwargs):
-                start_time = time.time()
-                status = 200
-                try:
-                    result = func(*args, **kwargs)
-                    return result
-                except Exception as e:
-                    status = 500
-                    raise
-                finally:
-                    duration = time.time() - start_time
-                    CustomMetrics.increment_panel_api_requests(
-                        endpoint,
-                        method,
-                        status
-                    )
-                    CustomMetrics.observe_panel_api_response_time(
-                        endpoint,
-                        duration
-                    )
-            
-            # Определяем, является ли функция асинхронной
-            if hasattr(func, '__code__') and func.__code__.co_flags & 0x80:
-                return async_wrapper
-            return sync_wrapper
+            return wrap_timed(
+                func,
+                observe_response_time,
+                on_success=partial(counter_aggregator.inc, ok_counter),
+                on_error=lambda _: counter_aggregator.inc(error_counter)
+            )
         
-        return decorator
\ No newline at end of file
+        return decorator
+
+
+# Дочерние метрики горячих путей, по одной на комбинацию меток
+_payment_system_response_time_child = cached_labels(CustomMetrics.payment_system_response_time)
+_payment_system_errors_child = cached_labels(CustomMetrics.payment_system_errors)
+_panel_api_requests_child = cached_labels(CustomMetrics.panel_api_requests)
+_panel_api_response_time_child = cached_labels(CustomMetrics.panel_api_response_time)
+
+# (endpoint, method) -> (observe времени ответа, счетчик 2xx, счетчик 5xx);
+# общие для всех обработчиков одного endpoint
+_PANEL_ENDPOINT_CHILDREN: Dict[Tuple[str, str], tuple] = {}
+
+
+def _panel_endpoint_children(endpoint: str, method: str) -> tuple:
+    key = (endpoint, method)
+    children = _PANEL_ENDPOINT_CHILDREN.get(key)
+    if children is None:
+        endpoint_label = normalize_endpoint(endpoint)
+        children = (
+            _panel_api_response_time_child(endpoint_label).observe,
+            _panel_api_requests_child(endpoint_label, method, status_label(200)),
+            _panel_api_requests_child(endpoint_label, method, status_label(500)),
+        )
+        _PANEL_ENDPOINT_CHILDREN[key] = children
+    return children
+
+
+def _resolve_gauge(name: str) -> Gauge:
+    for owner in (CustomMetrics, PrometheusMetrics):
+        metric = getattr(owner, name, None)
+        if isinstance(metric, Gauge):
+            return metric
+    # Аналитические gauge создаются только при обращении именно к ним
+    if name in _AnalyticsGauges.__slots__:
+        return getattr(analytics_gauges(), name)
+    raise ValueError(f"Unknown gauge: {name}")
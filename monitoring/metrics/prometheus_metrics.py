@@ -9,34 +9,325 @@ Prometheus метрики для мониторинга приложения.
 - Активных пользователей
 """
 
-from typing import Optional
+from typing import Callable, Optional
 from prometheus_client import Counter, Histogram, Gauge, CollectorRegistry, generate_latest
+from prometheus_client.core import CounterMetricFamily
+import inspect
+import random
+import re
+import threading
 import time
-from functools import wraps
+from collections import defaultdict
+from functools import lru_cache, wraps
+
+
+def cached_labels(metric, maxsize: int = 4096):
+    """
+    Кэшированный доступ к дочерним метрикам по значениям меток.
+    
+    labels() на каждый вызов собирает и хэширует метки и ищет дочернюю
+    метрику под блокировкой; кэш делает это один раз для каждой
+    комбинации меток. Метки передаются позиционно, в порядке labelnames.
+    
+    Args:
+        metric: Метрика с метками
+        maxsize: Максимальное количество кэшируемых комбинаций
+    
+    Returns:
+        Функция (*label_values) -> дочерняя метрика
+    """
+    return lru_cache(maxsize=maxsize)(metric.labels)
+
+
+# Метки статусов для всех HTTP кодов, чтобы не создавать строки на каждый вызов
+_STATUS_STR = {code: f"{code // 100}xx" for code in range(100, 600)}
+
+
+def status_label(status: int) -> str:
+    """
+    Класс HTTP статуса для метки.
+    
+    Метки status содержат только 1xx-5xx (или other), чтобы число рядов
+    не зависело от набора кодов, которые возвращают сервисы.
+    
+    Args:
+        status: HTTP статус
+    
+    Returns:
+        Строка вида '2xx'
+    """
+    label = _STATUS_STR.get(status)
+    if label is None:
+        try:
+            label = _STATUS_STR.get(int(status), "other")
+        except (TypeError, ValueError):
+            label = "other"
+    return label
+
+
+_UUID_SEGMENT = re.compile(r"/[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}(?=/|$)")
+_HASH_SEGMENT = re.compile(r"/[0-9a-fA-F]{32}(?=/|$)")
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+@lru_cache(maxsize=1024)
+def normalize_endpoint(endpoint: str) -> str:
+    """
+    Endpoint для метки без идентификаторов в пути.
+    
+    Числовые сегменты заменяются на :id, UUID на :uuid, 32-символьные
+    hex-строки на :hash, поэтому /user/12345/profile и /user/7/profile
+    попадают в один ряд. Метки endpoint всегда проходят через эту функцию.
+    
+    Args:
+        endpoint: Путь запроса
+    
+    Returns:
+        Нормализованный путь
+    """
+    endpoint = _UUID_SEGMENT.sub("/:uuid", endpoint)
+    endpoint = _HASH_SEGMENT.sub("/:hash", endpoint)
+    return _ID_SEGMENT.sub("/:id", endpoint)
+
+
+class FastCounter:
+    """
+    Счетчик с метками для самых частых событий.
+    
+    Значения хранятся в словарях с ключом-кортежем меток, без отдельного
+    объекта и блокировки на каждую дочернюю метрику. Словари разбиты на
+    полосы (stripes) со своими блокировками: поток пишет в полосу по своему
+    native id, поэтому параллельные потоки почти не конкурируют, а при
+    экспорте полосы суммируются в один обычный counter.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple = (),
+        registry: Optional[CollectorRegistry] = None,
+        stripes: int = 16
+    ):
+        """
+        Инициализация счетчика.
+        
+        Args:
+            name: Имя метрики
+            documentation: Описание метрики
+            labelnames: Имена меток
+            registry: Реестр для регистрации
+            stripes: Количество полос (степень двойки)
+        """
+        if stripes <= 0 or stripes & (stripes - 1):
+            raise ValueError("stripes must be a power of two")
+        self._name = name
+        self._documentation = documentation
+        self._labelnames = tuple(labelnames)
+        self._stripe_mask = stripes - 1
+        self._stripes = tuple(({}, threading.Lock()) for _ in range(stripes))
+        if registry is not None:
+            registry.register(self)
+    
+    def add(self, label_values: tuple, amount: float = 1) -> None:
+        """
+        Увеличить счетчик для комбинации меток.
+        
+        Args:
+            label_values: Значения меток в порядке labelnames
+            amount: Приращение
+        """
+        values, lock = self._stripes[threading.get_native_id() & self._stripe_mask]
+        with lock:
+            values[label_values] = values.get(label_values, 0.0) + amount
+    
+    def labels(self, *label_values: str) -> "_FastCounterChild":
+        """Дочерний счетчик с интерфейсом inc(), как у prometheus_client."""
+        if len(label_values) != len(self._labelnames):
+            raise ValueError(f"Incorrect label count for {self._name}")
+        return _FastCounterChild(self, tuple(label_values))
+    
+    def _family(self) -> CounterMetricFamily:
+        return CounterMetricFamily(self._name, self._documentation, labels=self._labelnames)
+    
+    def describe(self):
+        yield self._family()
+    
+    def collect(self):
+        totals = defaultdict(float)
+        for values, lock in self._stripes:
+            with lock:
+                items = list(values.items())
+            for label_values, value in items:
+                totals[label_values] += value
+        
+        family = self._family()
+        for label_values, value in totals.items():
+            family.add_metric(label_values, value)
+        yield family
+
+
+class _FastCounterChild:
+    """Дочерний счетчик FastCounter для фиксированной комбинации меток."""
+    
+    __slots__ = ('_counter', '_key')
+    
+    def __init__(self, counter: FastCounter, key: tuple):
+        self._counter = counter
+        self._key = key
+    
+    def inc(self, amount: float = 1) -> None:
+        self._counter.add(self._key, amount)
+
+
+# Запросы к БД быстрее порога записываются в гистограмму выборочно,
+# с долей DB_FAST_QUERY_SAMPLE_RATE; медленные записываются всегда
+DB_FAST_QUERY_THRESHOLD = 0.001  # секунды
+DB_FAST_QUERY_SAMPLE_RATE = 0.1
+
+
+def _sampled_db_observer(observe: Callable[[float], None]) -> Callable[[float], None]:
+    """Observe гистограммы запросов к БД с выборкой быстрых запросов."""
+    def sampled_observe(duration: float) -> None:
+        if duration < DB_FAST_QUERY_THRESHOLD and random.random() >= DB_FAST_QUERY_SAMPLE_RATE:
+            return
+        observe(duration)
+    
+    return sampled_observe
+
+
+def wrap_timed(
+    func: Callable,
+    observe: Callable[[float], None],
+    on_success: Optional[Callable[[], None]] = None,
+    on_error: Optional[Callable[[Exception], None]] = None
+) -> Callable:
+    """
+    Обернуть функцию замером времени выполнения.
+    
+    Синхронная или асинхронная обертка выбирается один раз, здесь.
+    
+    Args:
+        func: Оборачиваемая функция
+        observe: Получает длительность вызова в секундах
+        on_success: Вызывается после успешного выполнения
+        on_error: Вызывается с исключением, если функция его выбросила
+    
+    Returns:
+        Обертка над func
+    """
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start_time = time.monotonic_ns()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                if on_error is not None:
+                    on_error(e)
+                raise
+            finally:
+                observe((time.monotonic_ns() - start_time) * 1e-9)
+            if on_success is not None:
+                on_success()
+            return result
+        
+        return async_wrapper
+    
+    @wraps(func)
+    def sync_wrapper(*args, **kwargs):
+        start_time = time.monotonic_ns()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if on_error is not None:
+                on_error(e)
+            raise
+        finally:
+            observe((time.monotonic_ns() - start_time) * 1e-9)
+        if on_success is not None:
+            on_success()
+        return result
+    
+    return sync_wrapper
+
+
+class CounterAggregator:
+    """
+    Накопитель приращений счетчиков.
+    
+    Пока агрегация выключена, inc() сразу увеличивает счетчик. Во включенном
+    режиме приращения суммируются под одной блокировкой по дочерним
+    метрикам и переносятся в счетчики одним inc() на комбинацию меток
+    при flush(), который выполняется перед каждым экспортом метрик.
+    """
+    
+    def __init__(self):
+        self.enabled = False
+        self._pending = defaultdict(float)
+        self._lock = threading.Lock()
+    
+    def inc(self, child, amount: float = 1) -> None:
+        """
+        Увеличить счетчик.
+        
+        Args:
+            child: Счетчик (дочерняя метрика или метрика без меток)
+            amount: Приращение
+        """
+        if not self.enabled:
+            child.inc(amount)
+            return
+        with self._lock:
+            self._pending[child] += amount
+    
+    def flush(self) -> None:
+        """Перенести накопленные приращения в счетчики."""
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, defaultdict(float)
+        for child, amount in pending.items():
+            child.inc(amount)
+    
+    def set_enabled(self, enabled: bool) -> None:
+        """
+        Включить или выключить агрегацию.
+        
+        Args:
+            enabled: Накапливать приращения до flush()
+        """
+        self.enabled = enabled
+        if not enabled:
+            self.flush()
+
+
+# Общий накопитель для всех счетчиков приложения
+counter_aggregator = CounterAggregator()
 
 
 class PrometheusMetrics:
     """Класс для управления Prometheus метриками."""
     
-    # Реестр метрик
-    registry = CollectorRegistry()
+    # Реестр метрик; describe() коллекторов при регистрации не вызывается
+    registry = CollectorRegistry(auto_describe=False)
     
-    # Counter метрики
-    http_requests_total = Counter(
+    # Counter метрики (самые частые — FastCounter)
+    http_requests_total = FastCounter(
         'http_requests_total',
         'Общее количество HTTP запросов',
         ['method', 'endpoint', 'status'],
         registry=registry
     )
     
-    bot_messages_total = Counter(
+    bot_messages_total = FastCounter(
         'bot_messages_total',
         'Общее количество сообщений бота',
         ['handler', 'status'],
         registry=registry
     )
     
-    errors_total = Counter(
+    errors_total = FastCounter(
         'errors_total',
         'Общее количество ошибок',
         ['error_type', 'module'],
@@ -103,6 +394,7 @@ class PrometheusMetrics:
         'http_request_duration_seconds',
         'Длительность HTTP запросов в секундах',
         ['method', 'endpoint'],
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
         registry=registry
     )
     
@@ -110,6 +402,7 @@ class PrometheusMetrics:
         'bot_handler_duration_seconds',
         'Длительность обработки хендлеров бота в секундах',
         ['handler'],
+        buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
         registry=registry
     )
     
@@ -117,6 +410,7 @@ class PrometheusMetrics:
         'payment_processing_duration_seconds',
         'Длительность обработки платежей в секундах',
         ['payment_system'],
+        buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30),
         registry=registry
     )
     
@@ -124,6 +418,7 @@ class PrometheusMetrics:
         'database_query_duration_seconds',
         'Длительность запросов к БД в секундах',
         ['query_type'],
+        buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1),
         registry=registry
     )
     
@@ -173,6 +468,12 @@ class PrometheusMetrics:
         registry=registry
     )
     
+    database_query_fast_sample_rate = Gauge(
+        'database_query_fast_sample_rate',
+        'Доля быстрых запросов к БД, записываемых в database_query_duration_seconds',
+        registry=registry
+    )
+    
     @classmethod
     def increment_http_requests(
         cls,
@@ -181,11 +482,11 @@ class PrometheusMetrics:
         status: int
     ) -> None:
         """Увеличить счетчик HTTP запросов."""
-        cls.http_requests_total.labels(
-            method=method,
-            endpoint=endpoint,
-            status=str(status)
-        ).inc()
+        _http_requests_add((
+            method,
+            normalize_endpoint(endpoint),
+            _STATUS_STR.get(status) or status_label(status)
+        ))
     
     @classmethod
     def increment_bot_messages(
@@ -194,10 +495,7 @@ class PrometheusMetrics:
         status: str = 'success'
     ) -> None:
         """Увеличить счетчик сообщений бота."""
-        cls.bot_messages_total.labels(
-            handler=handler,
-            status=status
-        ).inc()
+        _bot_messages_add((handler, status))
     
     @classmethod
     def increment_errors(
@@ -206,10 +504,7 @@ class PrometheusMetrics:
         module: str
     ) -> None:
         """Увеличить счетчик ошибок."""
-        cls.errors_total.labels(
-            error_type=error_type,
-            module=module
-        ).inc()
+        _errors_add((error_type, module))
     
     @classmethod
     def increment_payment_requests(
@@ -218,10 +513,10 @@ class PrometheusMetrics:
         status: str = 'pending'
     ) -> None:
         """Увеличить счетчик запросов на оплату."""
-        cls.payment_requests_total.labels(
+        counter_aggregator.inc(cls.payment_requests_total.labels(
             payment_system=payment_system,
             status=status
-        ).inc()
+        ))
     
     @classmethod
     def increment_payment_success(
@@ -229,9 +524,9 @@ class PrometheusMetrics:
         payment_system: str
     ) -> None:
         """Увеличить счетчик успешных платежей."""
-        cls.payment_success_total.labels(
+        counter_aggregator.inc(cls.payment_success_total.labels(
             payment_system=payment_system
-        ).inc()
+        ))
     
     @classmethod
     def increment_payment_failed(
@@ -240,10 +535,10 @@ class PrometheusMetrics:
         reason: str
     ) -> None:
         """Увеличить счетчик неудачных платежей."""
-        cls.payment_failed_total.labels(
+        counter_aggregator.inc(cls.payment_failed_total.labels(
             payment_system=payment_system,
             reason=reason
-        ).inc()
+        ))
     
     @classmethod
     def increment_subscription_created(
@@ -251,9 +546,9 @@ class PrometheusMetrics:
         plan_type: str
     ) -> None:
         """Увеличить счетчик созданных подписок."""
-        cls.subscription_created_total.labels(
+        counter_aggregator.inc(cls.subscription_created_total.labels(
             plan_type=plan_type
-        ).inc()
+        ))
     
     @classmethod
     def increment_subscription_renewed(
@@ -261,9 +556,9 @@ class PrometheusMetrics:
         plan_type: str
     ) -> None:
         """Увеличить счетчик продленных подписок."""
-        cls.subscription_renewed_total.labels(
+        counter_aggregator.inc(cls.subscription_renewed_total.labels(
             plan_type=plan_type
-        ).inc()
+        ))
     
     @classmethod
     def increment_subscription_cancelled(
@@ -271,9 +566,9 @@ class PrometheusMetrics:
         reason: str
     ) -> None:
         """Увеличить счетчик отмененных подписок."""
-        cls.subscription_cancelled_total.labels(
+        counter_aggregator.inc(cls.subscription_cancelled_total.labels(
             reason=reason
-        ).inc()
+        ))
     
     @classmethod
     def increment_promo_code_used(
@@ -281,14 +576,14 @@ class PrometheusMetrics:
         promo_type: str
     ) -> None:
         """Увеличить счетчик использованных промокодов."""
-        cls.promo_code_used_total.labels(
+        counter_aggregator.inc(cls.promo_code_used_total.labels(
             promo_type=promo_type
-        ).inc()
+        ))
     
     @classmethod
     def increment_referral_registrations(cls) -> None:
         """Увеличить счетчик регистраций по реферальным ссылкам."""
-        cls.referral_registrations_total.inc()
+        counter_aggregator.inc(cls.referral_registrations_total)
     
     @classmethod
     def observe_http_request_duration(
@@ -298,10 +593,7 @@ class PrometheusMetrics:
         duration: float
     ) -> None:
         """Записать длительность HTTP запроса."""
-        cls.http_request_duration_seconds.labels(
-            method=method,
-            endpoint=endpoint
-        ).observe(duration)
+        _http_request_duration_child(method, normalize_endpoint(endpoint)).observe(duration)
     
     @classmethod
     def observe_bot_handler_duration(
@@ -310,9 +602,7 @@ class PrometheusMetrics:
         duration: float
     ) -> None:
         """Записать длительность обработки хендлера."""
-        cls.bot_handler_duration_seconds.labels(
-            handler=handler
-        ).observe(duration)
+        _bot_handler_duration_child(handler).observe(duration)
     
     @classmethod
     def observe_payment_processing_duration(
@@ -331,15 +621,32 @@ class PrometheusMetrics:
         query_type: str,
         duration: float
     ) -> None:
-        """Записать длительность запроса к БД."""
-        cls.database_query_duration_seconds.labels(
-            query_type=query_type
-        ).observe(duration)
+        """
+        Записать длительность запроса к БД.
+        
+        Запросы быстрее DB_FAST_QUERY_THRESHOLD записываются с вероятностью
+        DB_FAST_QUERY_SAMPLE_RATE, поэтому счетчики нижних бакетов нужно
+        делить на database_query_fast_sample_rate.
+        """
+        _database_query_observer(query_type)(duration)
     
     @classmethod
-    def set_active_users(cls, count: int) -> None:
-        """Установить количество активных пользователей."""
-        cls.active_users.set(count)
+    def set_database_fast_query_sample_rate(cls, rate: float) -> None:
+        """
+        Установить долю записываемых быстрых запросов к БД.
+        
+        Args:
+            rate: Доля от 0 до 1 (1 — записывать все запросы)
+        """
+        global DB_FAST_QUERY_SAMPLE_RATE
+        if not 0 <= rate <= 1:
+            raise ValueError("rate must be between 0 and 1")
+        DB_FAST_QUERY_SAMPLE_RATE = rate
+        cls.database_query_fast_sample_rate.set(rate)
+    
+    # Сеттеры gauge без меток — bound-методы Gauge.set, без промежуточного вызова
+    # Установить количество активных пользователей
+    set_active_users = active_users.set
     
     @classmethod
     def set_active_subscriptions(
@@ -352,15 +659,11 @@ class PrometheusMetrics:
             plan_type=plan_type
         ).set(count)
     
-    @classmethod
-    def set_total_users(cls, count: int) -> None:
-        """Установить общее количество пользователей."""
-        cls.total_users.set(count)
+    # Установить общее количество пользователей
+    set_total_users = total_users.set
     
-    @classmethod
-    def set_database_connections(cls, count: int) -> None:
-        """Установить количество подключений к БД."""
-        cls.database_connections.set(count)
+    # Установить количество подключений к БД
+    set_database_connections = database_connections.set
     
     @classmethod
     def set_cache_size(
@@ -373,10 +676,8 @@ class PrometheusMetrics:
             cache_type=cache_type
         ).set(size)
     
-    @classmethod
-    def set_balance_total(cls, amount: float) -> None:
-        """Установить общий баланс пользователей."""
-        cls.balance_total.set(amount)
+    # Установить общий баланс пользователей
+    set_balance_total = balance_total.set
     
     @classmethod
     def set_revenue_total(
@@ -392,6 +693,10 @@ class PrometheusMetrics:
     @classmethod
     def get_metrics(cls) -> bytes:
         """Получить метрики в формате Prometheus."""
+        from ..performance.profiler import flush_pending  # local import to avoid cycles
+        
+        counter_aggregator.flush()
+        flush_pending()
         return generate_latest(cls.registry)
     
     @staticmethod
@@ -404,69 +709,65 @@ class PrometheusMetrics:
             labels: Дополнительные метки для метрики
         """
         def decorator(func):
-            @wraps(func)
-            async def async_wrapper(*args, **kwargs):
-                start_time = time.time()
-                try:
-                    result = await func(*args, **kwargs)
-                    return result
-                finally:
-                    duration = time.time() - start_time
-                    if metric_name == 'http_request':
-                        PrometheusMetrics.observe_http_request_duration(
-                            labels.get('method', 'unknown'),
-                            labels.get('endpoint', 'unknown'),
-                            duration
-                        )
-                    elif metric_name == 'bot_handler':
-                        PrometheusMetrics.observe_bot_handler_duration(
-                            labels.get('handler', 'unknown'),
-                            duration
-                        )
-                    elif metric_name == 'payment':
-                        PrometheusMetrics.observe_payment_processing_duration(
-                            labels.get('payment_system', 'unknown'),
-                            duration
-                        )
-                    elif metric_name == 'database':
-                        PrometheusMetrics.observe_database_query_duration(
-                            labels.get('query_type', 'unknown'),
-                            duration
-                        )
-            
-            @wraps(func)
-            def sync_wrapper(*args, **kwargs):
-                start_time = time.time()
-                try:
-                    result = func(*args, **kwargs)
-                    return result
-                finally:
-                    duration = time.time() - start_time
-                    if metric_name == 'http_request':
-                        PrometheusMetrics.observe_http_request_duration(
-                            labels.get('method', 'unknown'),
-                            labels.get('endpoint', 'unknown'),
-                            duration
-                        )
-                    elif metric_name == 'bot_handler':
-                        PrometheusMetrics.observe_bot_handler_duration(
-                            labels.get('handler', 'unknown'),
-                            duration
-                        )
-                    elif metric_name == 'payment':
-                        PrometheusMetrics.observe_payment_processing_duration(
-                            labels.get('payment_system', 'unknown'),
-                            duration
-                        )
-                    elif metric_name == 'database':
-                        PrometheusMetrics.observe_database_query_duration(
-                            labels.get('query_type', 'unknown'),
-                            duration
-                        )
-            
-            # Определяем, является ли функция асинхронной
-            if hasattr(func, '__code__') and func.__code__.co_flags & 0x80:
-                return async_wrapper
-            return sync_wrapper
+            # Дочерняя метрика и ее observe разрешаются один раз при декорировании
+            metric_labels = labels or {}
+            if metric_name == 'http_request':
+                child = _http_request_duration_child(
+                    metric_labels.get('method', 'unknown'),
+                    normalize_endpoint(metric_labels.get('endpoint', 'unknown'))
+                )
+            elif metric_name == 'bot_handler':
+                child = _bot_handler_duration_child(
+                    metric_labels.get('handler', 'unknown')
+                )
+            elif metric_name == 'payment':
+                child = PrometheusMetrics.payment_processing_duration_seconds.labels(
+                    metric_labels.get('payment_system', 'unknown')
+                )
+            elif metric_name == 'database':
+                return wrap_timed(
+                    func,
+                    _database_query_observer(metric_labels.get('query_type', 'unknown'))
+                )
+            else:
+                # Неизвестная метрика: время записывать некуда
+                return func
+            return wrap_timed(func, child.observe)
         
-        return decorator
\ No newline at end of file
+        return decorator
+
+
+# Метрики профилировщика (monitoring.performance.profiler)
+function_duration_histogram = Histogram(
+    'function_duration_seconds',
+    'Длительность выполнения профилируемых функций в секундах',
+    ['function'],
+    registry=PrometheusMetrics.registry
+)
+
+function_memory_gauge = Gauge(
+    'function_memory_bytes',
+    'Прирост пикового RSS процесса во время выполнения функции',
+    ['function'],
+    registry=PrometheusMetrics.registry
+)
+
+# Методы самых частых счетчиков, связанные на уровне модуля: вызов
+# из increment_* обходится без поиска атрибута в классе
+_http_requests_add = PrometheusMetrics.http_requests_total.add
+_bot_messages_add = PrometheusMetrics.bot_messages_total.add
+_errors_add = PrometheusMetrics.errors_total.add
+
+# Дочерние метрики горячих путей, по одной на комбинацию меток
+_http_request_duration_child = cached_labels(PrometheusMetrics.http_request_duration_seconds)
+_bot_handler_duration_child = cached_labels(PrometheusMetrics.bot_handler_duration_seconds)
+_database_query_duration_child = cached_labels(PrometheusMetrics.database_query_duration_seconds)
+
+
+@lru_cache(maxsize=4096)
+def _database_query_observer(query_type: str) -> Callable[[float], None]:
+    # Observe с выборкой быстрых запросов, по одному на query_type
+    return _sampled_db_observer(_database_query_duration_child(query_type).observe)
+
+
+PrometheusMetrics.database_query_fast_sample_rate.set(DB_FAST_QUERY_SAMPLE_RATE)
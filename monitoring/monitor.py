@@ -9,13 +9,17 @@
 - Регистрацию health checks
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Awaitable
 import asyncio
+import concurrent.futures
 import logging
+import threading
 from aiohttp import web
-from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import CONTENT_TYPE_LATEST
 
 from .metrics import PrometheusMetrics, CustomMetrics
+from .metrics.prometheus_metrics import counter_aggregator
+from .performance.profiler import run_pending_flush
 from .health import HealthChecker, ReadinessChecker
 from .sentry import init_sentry
 from .logging import setup_logging, get_logger
@@ -23,6 +27,9 @@ from .logging import setup_logging, get_logger
 
 logger = get_logger(__name__)
 
+# Фоновая задача сброса замеров профилировщика
+_profiler_flush_task: Optional[asyncio.Task] = None
+
 
 class MonitoringServer:
     """Сервер для экспорта метрик и health checks."""
@@ -32,7 +39,9 @@ class MonitoringServer:
         host: str = '0.0.0.0',
         port: int = 9090,
         health_checker: Optional[HealthChecker] = None,
-        readiness_checker: Optional[ReadinessChecker] = None
+        readiness_checker: Optional[ReadinessChecker] = None,
+        metrics_cache_ttl: float = 1.0,
+        check_timeout: float = 10.0
     ):
         """
         Инициализация сервера мониторинга.
@@ -42,11 +51,30 @@ class MonitoringServer:
             port: Порт для прослушивания
             health_checker: Health checker
             readiness_checker: Readiness checker
+            metrics_cache_ttl: Время жизни кэша /metrics в секундах
+                (должно быть меньше scrape_interval)
+            check_timeout: Таймаут health, readiness и liveness проверок в
+                секундах; по истечении возвращается 503
         """
         self.host = host
         self.port = port
         self.health_checker = health_checker
         self.readiness_checker = readiness_checker
+        
+        # Кэш экспорта метрик между scrape-запросами
+        self._cache_bytes: Optional[bytes] = None
+        self._cache_headers: Dict[str, str] = {}
+        self._cache_expiry = 0.0
+        self._cache_ttl = metrics_cache_ttl
+        self._cache_lock = asyncio.Lock()
+        
+        # Собственный event loop в отдельном потоке (см. start_in_thread) и
+        # loop приложения, в котором выполняются health checks
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._app_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._check_timeout = check_timeout
+        
         self.app = web.Application()
         self._setup_routes()
         self.runner: Optional[web.AppRunner] = None
@@ -62,24 +90,44 @@ class MonitoringServer:
         """
         Обработчик для экспорта метрик Prometheus.
         
+        Экспорт кэшируется на metrics_cache_ttl секунд и генерируется
+        в пуле потоков, чтобы обход коллекторов не блокировал event loop.
+        
         Args:
             request: HTTP запрос
         
         Returns:
             HTTP ответ с метриками
         """
-        try:
-            metrics = PrometheusMetrics.get_metrics()
-            return web.Response(
-                body=metrics,
-                content_type=CONTENT_TYPE_LATEST
-            )
-        except Exception as e:
-            logger.error(f'Error generating metrics: {e}', exc_info=True)
-            return web.Response(
-                text='Error generating metrics',
-                status=500
-            )
+        loop = asyncio.get_running_loop()
+        if self._cache_bytes is None or loop.time() >= self._cache_expiry:
+            async with self._cache_lock:
+                # Пока ждали блокировку, кэш мог обновить другой запрос
+                if self._cache_bytes is None or loop.time() >= self._cache_expiry:
+                    try:
+                        self._cache_bytes = await loop.run_in_executor(
+                            None, PrometheusMetrics.get_metrics
+                        )
+                    except Exception as e:
+                        logger.error(f'Error generating metrics: {e}', exc_info=True)
+                        return web.Response(
+                            text='Error generating metrics',
+                            status=500
+                        )
+                    self._cache_headers = {
+                        'Content-Type': CONTENT_TYPE_LATEST,
+                        'Content-Length': str(len(self._cache_bytes)),
+                    }
+                    self._cache_expiry = loop.time() + self._cache_ttl
+        
+        # Заголовки готовятся вместе с кэшем. CONTENT_TYPE_LATEST содержит
+        # charset, который aiohttp не принимает в аргументе content_type.
+        # Сжатие намеренно не включается: повторяющийся текст экспорта
+        # дешевле отдать как есть, чем сжимать на каждый scrape.
+        return web.Response(
+            body=self._cache_bytes,
+            headers=self._cache_headers
+        )
     
     async def health_handler(self, request: web.Request) -> web.Response:
         """
@@ -98,11 +146,17 @@ class MonitoringServer:
                     status=503
                 )
             
-            result = await self.health_checker.check_all()
+            result = await self._run_in_app_loop(self.health_checker.check_all())
             
             status_code = 200 if result['status'] == 'healthy' else 503
             
             return web.json_response(result, status=status_code)
+        except asyncio.TimeoutError:
+            logger.error('Health check timed out after %ss', self._check_timeout)
+            return web.json_response(
+                {'status': 'unhealthy', 'message': 'Health check timed out'},
+                status=503
+            )
         except Exception as e:
             logger.error(f'Error in health check: {e}', exc_info=True)
             return web.json_response(
@@ -130,11 +184,17 @@ class MonitoringServer:
                     status=503
                 )
             
-            result = await self.readiness_checker.check_all()
+            result = await self._run_in_app_loop(self.readiness_checker.check_all())
             
             status_code = 200 if result['status'] == 'ready' else 503
             
             return web.json_response(result, status=status_code)
+        except asyncio.TimeoutError:
+            logger.error('Readiness check timed out after %ss', self._check_timeout)
+            return web.json_response(
+                {'status': 'not_ready', 'message': 'Readiness check timed out'},
+                status=503
+            )
         except Exception as e:
             logger.error(f'Error in readiness check: {e}', exc_info=True)
             return web.json_response(
@@ -147,7 +207,10 @@ class MonitoringServer:
     
     async def liveness_handler(self, request: web.Request) -> web.Response:
         """
-        Обработчик для liveness check (простая проверка что сервер работает).
+        Обработчик для liveness check.
+        
+        Проверяет, что event loop приложения отвечает: сервер работает в
+        своем потоке и иначе отвечал бы даже при заблокированном боте.
         
         Args:
             request: HTTP запрос
@@ -155,6 +218,14 @@ class MonitoringServer:
         Returns:
             HTTP ответ
         """
+        try:
+            await self._run_in_app_loop(asyncio.sleep(0))
+        except asyncio.TimeoutError:
+            logger.error('Application event loop did not respond within %ss', self._check_timeout)
+            return web.json_response(
+                {'status': 'dead', 'message': 'Application event loop is not responding'},
+                status=503
+            )
         return web.json_response({'status': 'alive'})
     
     async def start(self) -> None:
@@ -170,6 +241,77 @@ class MonitoringServer:
         if self.runner:
             await self.runner.cleanup()
             logger.info('Monitoring server stopped')
+    
+    @property
+    def is_threaded(self) -> bool:
+        """Сервер запущен в отдельном потоке."""
+        return self._thread is not None
+    
+    async def start_in_thread(self) -> None:
+        """
+        Запустить сервер в отдельном потоке с собственным event loop.
+        
+        Scrape /metrics не конкурирует с обработчиками приложения за
+        event loop. Health checks по-прежнему выполняются в loop
+        приложения, так как используют его подключения.
+        """
+        self._app_loop = asyncio.get_running_loop()
+        started: concurrent.futures.Future = concurrent.futures.Future()
+        
+        def run_loop() -> None:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            self._loop = loop
+            try:
+                loop.run_until_complete(self.start())
+            except BaseException as e:
+                started.set_exception(e)
+                loop.close()
+                return
+            started.set_result(None)
+            try:
+                loop.run_forever()
+            finally:
+                loop.close()
+        
+        self._thread = threading.Thread(
+            target=run_loop,
+            name='monitoring-server',
+            daemon=True
+        )
+        self._thread.start()
+        try:
+            await asyncio.wrap_future(started)
+        except BaseException:
+            self._thread = None
+            raise
+    
+    async def stop_in_thread(self) -> None:
+        """Остановить сервер, запущенный через start_in_thread."""
+        if self._thread is None or self._loop is None:
+            return
+        
+        loop = self._loop
+        await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self.stop(), loop))
+        loop.call_soon_threadsafe(loop.stop)
+        await asyncio.to_thread(self._thread.join)
+        self._thread = None
+        self._loop = None
+    
+    async def _run_in_app_loop(self, coro: Awaitable) -> Any:
+        """
+        Выполнить корутину в event loop приложения с таймаутом check_timeout.
+        
+        Raises:
+            asyncio.TimeoutError: loop приложения не выполнил корутину вовремя
+        """
+        app_loop = self._app_loop
+        if app_loop is None or app_loop is asyncio.get_running_loop():
+            return await asyncio.wait_for(coro, self._check_timeout)
+        return await asyncio.wait_for(
+            asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, app_loop)),
+            self._check_timeout
+        )
 
 
 async def setup_monitoring(
@@ -190,6 +332,7 @@ async def setup_monitoring(
     monitoring_host: str = '0.0.0.0',
     monitoring_port: int = 9090,
     enable_monitoring_server: bool = True,
+    aggregate_counters: bool = False,
     
     # Health check settings
     db_session: Optional[Any] = None,
@@ -217,6 +360,7 @@ async def setup_monitoring(
         monitoring_host: Хост для сервера мониторинга
         monitoring_port: Порт для сервера мониторинга
         enable_monitoring_server: Запустить сервер мониторинга
+        aggregate_counters: Накапливать приращения счетчиков до экспорта метрик
         db_session: Сессия БД для health checks
         redis_url: URL Redis для health checks
         telegram_token: Токен Telegram для health checks
@@ -254,6 +398,14 @@ async def setup_monitoring(
     else:
         logger.warning('Sentry DSN not provided, skipping Sentry initialization')
     
+    # Агрегация счетчиков: приращения сбрасываются в метрики перед экспортом
+    counter_aggregator.set_enabled(aggregate_counters)
+    
+    # Замеры профилировщика переносятся в метрики пачками в фоне
+    global _profiler_flush_task
+    if _profiler_flush_task is None or _profiler_flush_task.done():
+        _profiler_flush_task = asyncio.create_task(run_pending_flush())
+    
     # 3. Инициализация health checkers
     health_checker = None
     readiness_checker = None
@@ -290,7 +442,8 @@ async def setup_monitoring(
             readiness_checker=readiness_checker
         )
         
-        await monitoring_server.start()
+        # Отдельный поток и event loop: scrape не конкурирует с трафиком приложения
+        await monitoring_server.start_in_thread()
         logger.info(f'Monitoring server started on {monitoring_host}:{monitoring_port}')
         logger.info(f'Metrics available at: http://{monitoring_host}:{monitoring_port}/metrics')
         logger.info(f'Health check available at: http://{monitoring_host}:{monitoring_port}/health')
@@ -311,7 +464,19 @@ async def shutdown_monitoring(monitoring_server: Optional[MonitoringServer] = No
     """
     logger.info('Shutting down monitoring system...')
     
+    global _profiler_flush_task
+    if _profiler_flush_task is not None:
+        _profiler_flush_task.cancel()
+        try:
+            await _profiler_flush_task
+        except asyncio.CancelledError:
+            pass
+        _profiler_flush_task = None
+    
     if monitoring_server:
-        await monitoring_server.stop()
+        if monitoring_server.is_threaded:
+            await monitoring_server.stop_in_thread()
+        else:
+            await monitoring_server.stop()
     
     logger.info('Monitoring system shut down successfully')
\ No newline at end of file
@@ -2,15 +2,24 @@
 Профилировщик производительности.
 
 Предоставляет декоратор @profile для измерения времени выполнения
-и использования памяти функций.
+и (при PROFILE_MEMORY=1) прироста пикового RSS процесса.
 """
 
 import asyncio
+import collections
 import functools
 import logging
+import os
+import threading
 import time
-import tracemalloc
-from typing import Callable, Any
+import weakref
+from typing import Callable, Any, Hashable
+
+try:
+    import resource
+except ImportError:
+    # Нет на Windows
+    resource = None
 
 from monitoring.metrics.prometheus_metrics import (
     function_duration_histogram,
@@ -19,6 +28,41 @@ from monitoring.metrics.prometheus_metrics import (
 
 logger = logging.getLogger(__name__)
 
+# Замер памяти включается только явно (PROFILE_MEMORY=1). Замеряется прирост
+# пикового RSS процесса (ru_maxrss), а не выделения конкретного вызова:
+# это дешево, но растет только при обновлении пика.
+_PROFILE_MEMORY = os.environ.get("PROFILE_MEMORY") == "1" and resource is not None
+
+# ENABLE_PROFILE=0 отключает декораторы: функции возвращаются без обертки
+_PROFILE_ENABLED = os.environ.get("ENABLE_PROFILE", "1") != "0"
+
+# Готовые обертки: повторное декорирование той же функции (например, при
+# наследовании) возвращает существующую обертку. Значения слабые, поэтому
+# запись удаляется вместе с оберткой, а id функции не переиспользуется,
+# пока обертка (и ссылка на функцию в ней) жива.
+_wrapper_cache: "weakref.WeakValueDictionary[Hashable, Callable]" = weakref.WeakValueDictionary()
+
+
+# Замеры PerformanceProfiler копятся в очереди и переносятся в Prometheus
+# пачкой (flush_pending: фоновая задача и каждый экспорт метрик), а не под
+# блокировками метрик на каждом вызове.
+# append/popleft у deque атомарны, отдельная блокировка не нужна.
+_pending: collections.deque = collections.deque()
+
+# Сбросы выполняются из loop приложения и из потока экспорта метрик
+_flush_lock = threading.Lock()
+
+# Без фоновой задачи очередь сбрасывается прямо в __exit__ по достижении лимита
+_PENDING_LIMIT = 10000
+
+# Интервал фонового сброса очереди, секунды
+PROFILER_FLUSH_INTERVAL = 0.5
+
+
+def _peak_rss_bytes() -> int:
+    # ru_maxrss в Linux измеряется в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
 
 class PerformanceProfiler:
     """
@@ -30,22 +74,33 @@ class PerformanceProfiler:
     - Экспортирует метрики в Prometheus
     """
     
-    def __init__(self, func_name: str):
+    def __init__(
+        self,
+        func_name: str,
+        duration_child: Any = None,
+        memory_child: Any = None
+    ):
         """
         Инициализация профилировщика.
         
         Args:
             func_name: Имя функции для профилирования
+            duration_child: Готовая дочерняя метрика длительности для func_name
+            memory_child: Готовая дочерняя метрика памяти для func_name
         """
         self.func_name = func_name
         self.start_time = 0.0
         self.start_memory = 0
+        self._duration_child = (
+            duration_child or function_duration_histogram.labels(function=func_name)
+        )
+        self._memory_child = memory_child or function_memory_gauge.labels(function=func_name)
     
     def __enter__(self):
         """Начало профилирования."""
         self.start_time = time.perf_counter()
-        tracemalloc.start()
-        self.start_memory = tracemalloc.get_traced_memory()[0]
+        if _PROFILE_MEMORY:
+            self.start_memory = _peak_rss_bytes()
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -53,32 +108,87 @@ class PerformanceProfiler:
         # Измеряем время
         duration = time.perf_counter() - self.start_time
         
-        # Измеряем память
-        current_memory, peak_memory = tracemalloc.get_traced_memory()
-        memory_used = current_memory - self.start_memory
-        tracemalloc.stop()
+        # Измеряем прирост пикового RSS
+        memory_used = _peak_rss_bytes() - self.start_memory if _PROFILE_MEMORY else 0
         
         # Логируем результаты
         logger.info(
-            f"Performance [{self.func_name}]: "
-            f"duration={duration:.3f}s, "
-            f"memory={memory_used / 1024 / 1024:.2f}MB"
+            "Performance [%s]: duration=%.3fs, memory=%.2fMB",
+            self.func_name,
+            duration,
+            memory_used / 1024 / 1024
         )
         
-        # Экспортируем метрики
-        try:
-            function_duration_histogram.labels(function=self.func_name).observe(duration)
-            function_memory_gauge.labels(function=self.func_name).set(memory_used)
-        except Exception as e:
-            logger.warning(f"Ошибка экспорта метрик: {e}")
+        # Метрики экспортируются при следующем flush_pending()
+        _pending.append((self._duration_child, self._memory_child, duration, memory_used))
+        if len(_pending) >= _PENDING_LIMIT:
+            flush_pending()
+
+
+def flush_pending() -> None:
+    """
+    Перенести накопленные замеры профилировщика в Prometheus.
+    
+    Каждая длительность по-прежнему попадает в гистограмму отдельным
+    observe(), чтобы не искажать бакеты; память записывается один раз на
+    функцию — максимальный прирост среди сброшенных замеров. Сбросы из
+    фоновой задачи и из экспорта метрик выполняются по очереди, поэтому
+    частичный максимум одного сброса не затирает значение другого.
+    Ошибка экспорта одного замера не прерывает сброс остальных.
+    """
+    with _flush_lock:
+        peak_memory = {}
+        failed = 0
+        last_error = None
+        while True:
+            try:
+                duration_child, memory_child, duration, memory_used = _pending.popleft()
+            except IndexError:
+                break
+            try:
+                duration_child.observe(duration)
+            except Exception as e:
+                failed += 1
+                last_error = e
+            if memory_used > peak_memory.get(memory_child, -1):
+                peak_memory[memory_child] = memory_used
+        
+        if _PROFILE_MEMORY:
+            for memory_child, memory_used in peak_memory.items():
+                try:
+                    memory_child.set(memory_used)
+                except Exception as e:
+                    failed += 1
+                    last_error = e
+    
+    if failed:
+        logger.warning("Ошибка экспорта метрик (%d замеров): %s", failed, last_error)
+
+
+async def run_pending_flush(interval: float = PROFILER_FLUSH_INTERVAL) -> None:
+    """
+    Периодически сбрасывать замеры профилировщика до отмены задачи.
+    
+    Args:
+        interval: Интервал между сбросами в секундах
+    """
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            flush_pending()
+    finally:
+        flush_pending()
 
 
 def profile(func: Callable) -> Callable:
     """
     Декоратор для профилирования функций.
     
-    Автоматически измеряет время выполнения и использование памяти.
+    Автоматически измеряет время выполнения, а при PROFILE_MEMORY=1 также
+    прирост памяти (с записью в лог каждого вызова). Без PROFILE_MEMORY
+    длительность только записывается в function_duration_seconds.
     Поддерживает как синхронные, так и асинхронные функции.
+    При ENABLE_PROFILE=0 возвращает функцию без изменений.
     
     Args:
         func: Функция для профилирования
@@ -92,20 +202,60 @@ def profile(func: Callable) -> Callable:
             # Автоматическое измерение времени и памяти
             pass
     """
+    if not _PROFILE_ENABLED:
+        return func
+    
+    key = ("profile", id(func))
+    wrapper = _wrapper_cache.get(key)
+    if wrapper is None:
+        wrapper = _build_profile_wrapper(func)
+        _wrapper_cache[key] = wrapper
+    return wrapper
+
+
+def _build_profile_wrapper(func: Callable) -> Callable:
     func_name = f"{func.__module__}.{func.__name__}"
     is_async = asyncio.iscoroutinefunction(func)
     
+    # Дочерние метрики разрешаются один раз при декорировании
+    duration_child = function_duration_histogram.labels(function=func_name)
+    memory_child = function_memory_gauge.labels(function=func_name)
+    
+    if _PROFILE_MEMORY:
+        # Полный замер с памятью и логом каждого вызова
+        if is_async:
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with PerformanceProfiler(func_name, duration_child, memory_child):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+        else:
+            @functools.wraps(func)
+            def sync_wrapper(*args, **kwargs):
+                with PerformanceProfiler(func_name, duration_child, memory_child):
+                    return func(*args, **kwargs)
+            return sync_wrapper
+    
+    # Быстрый путь: только длительность, без объекта профилировщика на вызов
+    observe = duration_child.observe
+    
     if is_async:
         @functools.wraps(func)
         async def async_wrapper(*args, **kwargs):
-            with PerformanceProfiler(func_name):
+            start_time = time.perf_counter()
+            try:
                 return await func(*args, **kwargs)
+            finally:
+                observe(time.perf_counter() - start_time)
         return async_wrapper
     else:
         @functools.wraps(func)
         def sync_wrapper(*args, **kwargs):
-            with PerformanceProfiler(func_name):
+            start_time = time.perf_counter()
+            try:
                 return func(*args, **kwargs)
+            finally:
+                observe(time.perf_counter() - start_time)
         return sync_wrapper
 
 
@@ -114,6 +264,7 @@ def profile_method(threshold_ms: float = 100.0):
     Декоратор для профилирования методов с порогом.
     
     Логирует только если время выполнения превышает порог.
+    При ENABLE_PROFILE=0 возвращает функцию без изменений.
     
     Args:
         threshold_ms: Порог в миллисекундах
@@ -127,39 +278,62 @@ def profile_method(threshold_ms: float = 100.0):
             # Логируется только если > 500ms
             pass
     """
+    # Порог в наносекундах: на быстром пути только целочисленное сравнение
+    threshold_ns = int(threshold_ms * 1_000_000)
+    
     def decorator(func: Callable) -> Callable:
-        func_name = f"{func.__module__}.{func.__name__}"
-        is_async = asyncio.iscoroutinefunction(func)
+        if not _PROFILE_ENABLED:
+            return func
         
-        if is_async:
-            @functools.wraps(func)
-            async def async_wrapper(*args, **kwargs):
-                start_time = time.perf_counter()
-                result = await func(*args, **kwargs)
-                duration = (time.perf_counter() - start_time) * 1000
-                
-                if duration > threshold_ms:
-                    logger.warning(
-                        f"Slow method [{func_name}]: {duration:.2f}ms "
-                        f"(threshold: {threshold_ms}ms)"
-                    )
-                
-                return result
-            return async_wrapper
-        else:
-            @functools.wraps(func)
-            def sync_wrapper(*args, **kwargs):
-                start_time = time.perf_counter()
-                result = func(*args, **kwargs)
-                duration = (time.perf_counter() - start_time) * 1000
-                
-                if duration > threshold_ms:
-                    logger.warning(
-                        f"Slow method [{func_name}]: {duration:.2f}ms "
-                        f"(threshold: {threshold_ms}ms)"
-                    )
-                
-                return result
-            return sync_wrapper
+        key = ("profile_method", id(func), threshold_ns)
+        wrapper = _wrapper_cache.get(key)
+        if wrapper is None:
+            wrapper = _build_method_wrapper(func, threshold_ms, threshold_ns)
+            _wrapper_cache[key] = wrapper
+        return wrapper
+    
+    return decorator
+
+
+def _build_method_wrapper(
+    func: Callable,
+    threshold_ms: float,
+    threshold_ns: int
+) -> Callable:
+    func_name = f"{func.__module__}.{func.__name__}"
+    is_async = asyncio.iscoroutinefunction(func)
     
-    return decorator
\ No newline at end of file
+    if is_async:
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start_time = time.monotonic_ns()
+            result = await func(*args, **kwargs)
+            duration_ns = time.monotonic_ns() - start_time
+            
+            if duration_ns > threshold_ns:
+                logger.warning(
+                    "Slow method [%s]: %.2fms (threshold: %sms)",
+                    func_name,
+                    duration_ns / 1e6,
+                    threshold_ms
+                )
+            
+            return result
+        return async_wrapper
+    else:
+        @functools.wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            start_time = time.monotonic_ns()
+            result = func(*args, **kwargs)
+            duration_ns = time.monotonic_ns() - start_time
+            
+            if duration_ns > threshold_ns:
+                logger.warning(
+                    "Slow method [%s]: %.2fms (threshold: %sms)",
+                    func_name,
+                    duration_ns / 1e6,
+                    threshold_ms
+                )
+            
+            return result
+        return sync_wrapper
@@ -0,0 +1,136 @@
+"""
+Тесты маскирования чувствительных данных в handlers логирования.
+"""
+
+import io
+import logging
+import queue
+import sys
+
+import pytest
+
+from monitoring.logging import log_handlers
+from monitoring.logging.log_handlers import (
+    DeferredQueueHandler,
+    OrjsonFormatter,
+    TimedRotatingFileHandlerWithCompression,
+    get_async_handler,
+    get_stream_handler,
+    stop_async_handlers,
+)
+
+
+SECRET_MESSAGE = 'provider response {"password": "hunter2", "token": "abcd"}'
+
+
+def _emit(handler: logging.Handler, msg: str, *args) -> str:
+    stream = io.StringIO()
+    handler.setStream(stream)
+    logger = logging.getLogger('tests.log_handlers')
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.info(msg, *args)
+    return stream.getvalue()
+
+
+def test_plain_output_masks_secrets():
+    output = _emit(get_stream_handler(use_json=False), SECRET_MESSAGE)
+    
+    assert 'hunter2' not in output
+    assert 'abcd' not in output
+
+
+def test_json_output_masks_secrets():
+    output = _emit(get_stream_handler(use_json=True), SECRET_MESSAGE)
+    
+    assert 'hunter2' not in output
+    assert 'abcd' not in output
+
+
+def test_json_output_masks_secrets_in_args():
+    output = _emit(get_stream_handler(use_json=True), 'provider response %s', SECRET_MESSAGE[18:])
+    
+    assert 'hunter2' not in output
+    assert 'abcd' not in output
+
+
+def test_orjson_formatter_masks_secrets():
+    pytest.importorskip('orjson')
+    record = logging.LogRecord(
+        'tests.log_handlers', logging.INFO, __file__, 1, SECRET_MESSAGE, None, None
+    )
+    
+    output = OrjsonFormatter().format(record)
+    
+    assert 'hunter2' not in output
+    assert 'abcd' not in output
+
+
+def test_deferred_queue_handler_keeps_exc_info():
+    handler = DeferredQueueHandler(queue.SimpleQueue())
+    try:
+        raise ZeroDivisionError('boom')
+    except ZeroDivisionError:
+        record = logging.LogRecord(
+            'tests.log_handlers', logging.ERROR, __file__, 1, 'boom %s', (1,), sys.exc_info()
+        )
+    
+    prepared = handler.prepare(record)
+    
+    assert prepared.msg == 'boom 1'
+    assert prepared.args is None
+    assert prepared.exc_info is not None
+    assert record.args == (1,)
+
+
+def test_stop_async_handlers_is_idempotent():
+    get_async_handler(logging.NullHandler())
+    
+    stop_async_handlers()
+    stop_async_handlers()
+
+
+NON_ASCII_SECRETS = [
+    ('login password=пароль ok', 'пароль'),
+    ('provider token: токен-123', 'токен'),
+]
+
+
+@pytest.mark.parametrize('text, secret', NON_ASCII_SECRETS)
+def test_non_ascii_secrets_masked_by_regex_path(monkeypatch, text, secret):
+    monkeypatch.setattr(log_handlers, '_HS_DB', None)
+    
+    assert secret not in log_handlers.scrub_sensitive_data(text)
+
+
+@pytest.mark.parametrize('text, secret', NON_ASCII_SECRETS)
+def test_non_ascii_text_bypasses_hyperscan_path(monkeypatch, text, secret):
+    monkeypatch.setattr(log_handlers, '_HS_DB', None)
+    regex_result = log_handlers.scrub_sensitive_data(text)
+    
+    # Hyperscan без UCP не находит не-ASCII значения; такие строки
+    # должны обрабатываться через _SENSITIVE_RE
+    monkeypatch.setattr(log_handlers, '_HS_DB', object())
+    monkeypatch.setattr(log_handlers, '_hyperscan_scrub', lambda value: value)
+    hyperscan_result = log_handlers.scrub_sensitive_data(text)
+    
+    assert hyperscan_result == regex_result
+    assert secret not in hyperscan_result
+
+
+def test_compressed_rotation_counts_only_finished_archives(tmp_path):
+    handler = TimedRotatingFileHandlerWithCompression(
+        str(tmp_path / 'app.log'), backup_count=2, delay=True
+    )
+    for name in (
+        'app.log.2026-10-01.gz',
+        'app.log.2026-10-02.gz',
+        'app.log.2026-10-03.gz',
+        'app.log.2026-10-04',
+        'app.log.2026-10-04.gz.tmp',
+    ):
+        (tmp_path / name).touch()
+    
+    assert handler.getFilesToDelete() == [str(tmp_path / 'app.log.2026-10-01.gz')]
+    handler.close()